@@ -0,0 +1,95 @@
+# Multi-threaded booking stress test for controller/allocator.py.
+# Usage: python benchmarks/bench_allocator.py [--lots 4] [--spots 200] [--threads 16]
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+from models.models import db, ParkingLot, ParkingSpot, Reservation
+from controller.allocator import claim_spot
+
+
+def make_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 30}}
+    db.init_app(app)
+    return app
+
+
+def seed(app, lots, spots):
+    with app.app_context():
+        db.create_all()
+        for i in range(lots):
+            lot = ParkingLot(prime_location_name=f'Bench {i}', maximum_spots=spots, available_count=spots, occupied_count=0)
+            db.session.add(lot)
+            db.session.flush()
+            db.session.add_all([ParkingSpot(lot_id=lot.id, spot_number=n + 1, status='A') for n in range(spots)])
+        db.session.commit()
+        return [lot.id for lot in ParkingLot.query.all()]
+
+
+def worker(app, lot_ids, attempts, claims, lock):
+    with app.app_context():
+        for n in range(attempts):
+            lot_id = lot_ids[n % len(lot_ids)]
+            while True:
+                try:
+                    now = datetime.now()
+                    spot_id = claim_spot(lot_id, now, now + timedelta(hours=1), now=now)
+                    if spot_id is not None:
+                        db.session.add(Reservation(spot_id=spot_id, start_time=now, end_time=now + timedelta(hours=1)))
+                    db.session.commit()
+                    break
+                except OperationalError:
+                    db.session.rollback()
+            if spot_id is not None:
+                with lock:
+                    claims.append((lot_id, spot_id))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lots', type=int, default=4)
+    parser.add_argument('--spots', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'bench.db'))
+        lot_ids = seed(app, args.lots, args.spots)
+
+        # Ask for 50% more bookings than there are spots so the full-lot path is exercised too
+        attempts = (args.lots * args.spots * 3 // 2) // args.threads + 1
+        claims, lock = [], threading.Lock()
+        threads = [threading.Thread(target=worker, args=(app, lot_ids, attempts, claims, lock)) for _ in range(args.threads)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        spot_claims = Counter(spot_id for _, spot_id in claims)
+        double_booked = [spot_id for spot_id, n in spot_claims.items() if n > 1]
+        with app.app_context():
+            occupied = ParkingSpot.query.filter_by(status='O').count()
+
+        print(f'{len(claims)} bookings in {elapsed:.2f}s using {args.threads} threads')
+        for lot_id, n in sorted(Counter(lot_id for lot_id, _ in claims).items()):
+            print(f'  lot {lot_id}: {n} bookings, {n / elapsed:.1f} bookings/sec')
+        print(f'occupied spots: {occupied}, double-booked spots: {len(double_booked)}')
+        if double_booked or occupied != len(claims) or len(claims) != args.lots * args.spots:
+            sys.exit('FAILED: allocator handed out inconsistent spots')
+
+
+if __name__ == '__main__':
+    main()
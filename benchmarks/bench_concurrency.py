@@ -0,0 +1,134 @@
+# Concurrent bookings plus dashboard reads against SQLite, with the old default
+# settings (rollback journal, synchronous=FULL) and the tuned ones from
+# models/database.py (WAL, synchronous=NORMAL, busy_timeout).
+# Usage: python benchmarks/bench_concurrency.py [--writers 8] [--readers 8] [--seconds 10]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+from models.models import db, ParkingLot
+from models.database import init_database
+from controller.allocator import create_reservation
+from controller.occupancy import lot_occupancy
+from controller.provisioning import add_spots
+
+PROFILES = {
+    'default': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL'},
+    'tuned': {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'NORMAL'},
+}
+
+
+def make_app(path, settings):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config.update(settings)
+    init_database(app)
+    return app
+
+
+def seed(app, lots, spots):
+    with app.app_context():
+        db.create_all()
+        for i in range(lots):
+            lot = ParkingLot(prime_location_name=f'Bench {i}', maximum_spots=spots)
+            db.session.add(lot)
+            db.session.flush()
+            add_spots(lot.id, spots)
+        db.session.commit()
+        return [lot_id for (lot_id,) in db.session.query(ParkingLot.id)]
+
+
+class Counters:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bookings = 0
+        self.reads = 0
+        self.locked = 0
+
+    def add(self, **deltas):
+        with self.lock:
+            for name, n in deltas.items():
+                setattr(self, name, getattr(self, name) + n)
+
+
+def writer(app, lot_ids, deadline, counters, seed_value):
+    rng = random.Random(seed_value)
+    with app.app_context():
+        while time.perf_counter() < deadline:
+            start = datetime.now() + timedelta(days=rng.randint(1, 365), hours=rng.randint(0, 23))
+            try:
+                reservation = create_reservation(None, rng.choice(lot_ids), start, start + timedelta(hours=2))
+                db.session.commit()
+                counters.add(bookings=1 if reservation else 0)
+            except OperationalError:
+                db.session.rollback()
+                counters.add(locked=1)
+        db.session.remove()
+
+
+def reader(app, deadline, counters, interval):
+    with app.app_context():
+        while time.perf_counter() < deadline:
+            try:
+                lot_occupancy()
+                db.session.commit()
+                counters.add(reads=1)
+                time.sleep(interval)
+            except OperationalError:
+                db.session.rollback()
+                counters.add(locked=1)
+        db.session.remove()
+
+
+def run(profile, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'bench.db'), PROFILES[profile])
+        lot_ids = seed(app, args.lots, args.spots)
+        counters = Counters()
+        deadline = time.perf_counter() + args.seconds
+        threads = [threading.Thread(target=writer, args=(app, lot_ids, deadline, counters, i)) for i in range(args.writers)]
+        threads += [threading.Thread(target=reader, args=(app, deadline, counters, args.read_interval)) for _ in range(args.readers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        with app.app_context():
+            db.engine.dispose()
+        return {
+            'bookings_per_sec': counters.bookings / args.seconds,
+            'reads_per_sec': counters.reads / args.seconds,
+            'locked_errors': counters.locked,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--read-interval', type=float, default=0.01, help='pause between a reader\'s queries')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--lots', type=int, default=10)
+    parser.add_argument('--spots', type=int, default=100)
+    args = parser.parse_args()
+
+    results = {profile: run(profile, args) for profile in PROFILES}
+    print(f"{args.writers} writer(s), {args.readers} reader(s), {args.seconds:g}s per profile")
+    print(f"{'profile':<10}{'bookings/s':>12}{'reads/s':>10}{'locked':>8}")
+    for profile, result in results.items():
+        print(f"{profile:<10}{result['bookings_per_sec']:>12.1f}{result['reads_per_sec']:>10.1f}{result['locked_errors']:>8}")
+    default, tuned = results['default']['bookings_per_sec'], results['tuned']['bookings_per_sec']
+    if default:
+        print(f'booking throughput: {tuned / default:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# Login throughput per core for one or more password-hash policies, driven through
+# the Flask test client, plus the latency of a cheap route served meanwhile.
+# Usage: python benchmarks/bench_login.py [--methods pbkdf2:sha256:1000000,pbkdf2:sha256:600000]
+#            [--threads 8] [--logins 64]
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[max(0, min(len(values) - 1, round(pct / 100 * len(values)) - 1))] if values else 0
+
+
+def run(app, method, args):
+    from werkzeug.security import generate_password_hash
+    from controller.passwords import password_hasher
+    from models.models import db, User
+
+    password_hasher.configure(method=method)
+    with app.app_context():
+        User.query.filter(User.email.like('bench%')).delete(synchronize_session=False)
+        stored = generate_password_hash('password', method=method)
+        db.session.add_all([User(fullname=f'Bench {i}', email=f'bench{i}@example.com', password=stored)
+                            for i in range(args.threads)])
+        db.session.commit()
+
+    done = threading.Event()
+    logins, probes = [], []
+
+    def login_worker(index):
+        client = app.test_client()
+        for _ in range(args.logins // args.threads):
+            status = client.post('/login', data={'email': f'bench{index}@example.com', 'password': 'password'}).status_code
+            logins.append(status)
+            client.get('/logout')
+
+    def probe_worker():
+        # A route that never hashes; its latency shows whether logins starve other traffic
+        client = app.test_client()
+        while not done.is_set():
+            started = time.perf_counter()
+            client.get('/metrics')
+            probes.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=login_worker, args=(i,)) for i in range(args.threads)]
+    probe = threading.Thread(target=probe_worker)
+    probe.start()
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    probe.join()
+
+    ok = sum(1 for status in logins if status == 302)
+    cores = min(password_hasher.workers, os.cpu_count() or 1)
+    return {
+        'logins_per_sec': ok / elapsed,
+        'logins_per_sec_per_core': ok / elapsed / cores,
+        'failed': len(logins) - ok,
+        'probe_p95_ms': percentile(probes, 95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--methods', default='pbkdf2:sha256:1000000,pbkdf2:sha256:600000,scrypt:32768:8:1')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=64, help='total logins per method')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    from app import create_app, setup_app
+    app = create_app({'WTF_CSRF_ENABLED': False})
+    setup_app(app)
+
+    from controller.passwords import password_hasher
+    print(f'{args.logins} logins per method from {args.threads} threads, '
+          f'{password_hasher.workers} hash worker(s), {os.cpu_count()} CPU(s)')
+    print(f"{'method':<26}{'logins/s':>10}{'per core':>10}{'failed':>8}{'probe p95 ms':>14}")
+    for method in args.methods.split(','):
+        result = run(app, method, args)
+        print(f"{method:<26}{result['logins_per_sec']:>10.1f}{result['logins_per_sec_per_core']:>10.1f}"
+              f"{result['failed']:>8}{result['probe_p95_ms']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
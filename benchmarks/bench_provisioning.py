@@ -0,0 +1,51 @@
+# Times bulk spot provisioning (create, grow, shrink) for increasing lot sizes.
+# Usage: python benchmarks/bench_provisioning.py [--sizes 100,1000,10000,50000]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from models.models import db, ParkingLot
+from controller.provisioning import add_spots, remove_spots
+
+
+def make_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    return app
+
+
+def timed(step):
+    started = time.perf_counter()
+    step()
+    db.session.commit()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='100,1000,10000,50000')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'bench.db'))
+        with app.app_context():
+            db.create_all()
+            print(f'{"spots":>8} {"create":>10} {"grow 50%":>10} {"shrink 50%":>11}')
+            for size in [int(s) for s in args.sizes.split(',')]:
+                lot = ParkingLot(prime_location_name=f'Bench {size}', maximum_spots=size)
+                db.session.add(lot)
+                db.session.flush()
+                create = timed(lambda: add_spots(lot.id, size))
+                grow = timed(lambda: add_spots(lot.id, size // 2))
+                shrink = timed(lambda: remove_spots(lot.id, size // 2))
+                print(f'{size:>8} {create * 1000:>8.1f}ms {grow * 1000:>8.1f}ms {shrink * 1000:>9.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
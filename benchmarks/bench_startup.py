@@ -0,0 +1,112 @@
+# Startup cost of the app, each run in a fresh interpreter the way a gunicorn worker
+# boots: module imports, create_app(), setup_app() and the first request served.
+# "cold start" runs against a new database (schema creation and admin seed);
+# "worker boot" against one already at the current schema version.
+# Usage: python benchmarks/bench_startup.py [--runs 5] [--output startup.json]
+#            [--compare previous.json] [--budget-ms 1500]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PHASES = ('import', 'create_app', 'setup_app', 'first_request', 'total')
+
+
+def child():
+    # Runs in the fresh interpreter; prints the phase timings as JSON
+    started = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    from app import create_app, setup_app
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+    setup_app(app)
+    set_up = time.perf_counter()
+    status = app.test_client().get('/login').status_code
+    served = time.perf_counter()
+    print(json.dumps({
+        'import': imported - started,
+        'create_app': created - imported,
+        'setup_app': set_up - created,
+        'first_request': served - set_up,
+        'total': served - started,
+        'status': status,
+        'modules': len(sys.modules),
+    }))
+
+
+def boot(database_url):
+    env = dict(os.environ, DATABASE_URL=database_url, LOG_LEVEL='WARNING')
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'], env=env, cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    if result['status'] != 200:
+        raise SystemExit(f"first request returned {result['status']}")
+    return result
+
+
+def summarize(runs):
+    return {phase: {'median_ms': statistics.median(r[phase] for r in runs) * 1000,
+                    'max_ms': max(r[phase] for r in runs) * 1000} for phase in PHASES}
+
+
+def print_report(report, previous=None):
+    print(f"{'scenario':<14}{'phase':<15}{'median ms':>11}{'max ms':>9}" + (f"{'prev ms':>10}" if previous else ''))
+    for scenario, phases in report['scenarios'].items():
+        for phase, values in phases.items():
+            line = f"{scenario:<14}{phase:<15}{values['median_ms']:>11.1f}{values['max_ms']:>9.1f}"
+            if previous and scenario in previous['scenarios']:
+                line += f"{previous['scenarios'][scenario][phase]['median_ms']:>10.1f}"
+            print(line)
+    print(f"{report['modules']} modules loaded by a booted worker")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--compare', help='previous results JSON to compare medians against')
+    parser.add_argument('--budget-ms', type=float, help='exit non-zero if the median worker boot exceeds this')
+    args = parser.parse_args()
+    if args.child:
+        return child()
+
+    tmp = tempfile.mkdtemp()
+    cold, warm = [], []
+    for i in range(args.runs):
+        cold.append(boot(f"sqlite:///{os.path.join(tmp, f'cold{i}.db')}"))
+    current = f"sqlite:///{os.path.join(tmp, 'cold0.db')}"
+    for _ in range(args.runs):
+        warm.append(boot(current))
+
+    report = {
+        'runs': args.runs,
+        'python': sys.version.split()[0],
+        'modules': warm[-1]['modules'],
+        'scenarios': {'cold start': summarize(cold), 'worker boot': summarize(warm)},
+    }
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_report(report, previous)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Results written to {args.output}')
+
+    boot_ms = report['scenarios']['worker boot']['total']['median_ms']
+    if args.budget_ms and boot_ms > args.budget_ms:
+        print(f'Worker boot median {boot_ms:.1f} ms is over the {args.budget_ms:.0f} ms budget')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
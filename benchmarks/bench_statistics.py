@@ -0,0 +1,83 @@
+# Times the rollup backfill and parking_statistics over synthetic reservation histories.
+# Usage: python benchmarks/bench_statistics.py [--sizes 10000,100000,1000000] [--lots 50]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import event
+from models.models import db, ParkingLot, ParkingSpot, Reservation
+from controller.statistics import parking_statistics_data
+from controller.rollups import backfill
+
+SPOTS_PER_LOT = 20
+
+
+def make_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    return app
+
+
+def seed(lots, reservations, current_year):
+    db.create_all()
+    db.session.execute(ParkingLot.__table__.insert(), [
+        {'id': i + 1, 'prime_location_name': f'Lot {i + 1}', 'maximum_spots': SPOTS_PER_LOT,
+         'available_count': SPOTS_PER_LOT, 'occupied_count': 0}
+        for i in range(lots)
+    ])
+    db.session.execute(ParkingSpot.__table__.insert(), [
+        {'lot_id': lot_id, 'spot_number': n + 1, 'status': 'A'}
+        for lot_id in range(1, lots + 1) for n in range(SPOTS_PER_LOT)
+    ])
+    rng = random.Random(42)
+    first = datetime(current_year - 4, 1, 1)
+    span = int((datetime(current_year + 1, 1, 1) - first).total_seconds() // 60)
+    spot_count = lots * SPOTS_PER_LOT
+    batch = []
+    for _ in range(reservations):
+        start = first + timedelta(minutes=rng.randrange(span))
+        batch.append({'spot_id': rng.randint(1, spot_count), 'user_id': 1, 'status': 'I',
+                      'start_time': start, 'end_time': start + timedelta(hours=2)})
+        if len(batch) == 50000:
+            db.session.execute(Reservation.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Reservation.__table__.insert(), batch)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--lots', type=int, default=50)
+    args = parser.parse_args()
+    current_year = datetime.now().year
+
+    for size in [int(s) for s in args.sizes.split(',')]:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = make_app(os.path.join(tmp, 'bench.db'))
+            with app.app_context():
+                seed(args.lots, size, current_year)
+                started = time.perf_counter()
+                backfill()
+                backfill_elapsed = time.perf_counter() - started
+                statements = []
+                event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(1))
+                started = time.perf_counter()
+                parking_statistics_data(current_year)
+                elapsed = time.perf_counter() - started
+                db.engine.dispose()
+        print(f'{size:>9} reservations, {args.lots} lots: page {elapsed * 1000:8.1f} ms, '
+              f'{len(statements)} queries (backfill {backfill_elapsed:.1f}s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+# Drives the main user and admin flows and reports latency percentiles, throughput
+# and SQL statements per request. Runs in-process through the Flask test client by
+# default, or against a running server with --url. Seed data first with seed_data.py.
+# Usage: python benchmarks/run_load.py [--url http://127.0.0.1:5000] [--concurrency 4]
+#            [--iterations 20] [--output results.json] [--compare previous.json]
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Flow name -> Flask endpoint, used to read SQL counts from /metrics
+FLOWS = {
+    'login': 'user.login',
+    'dashboard_user': 'user.dashboard_user',
+    'book_spot': 'user.book_spot',
+    'release_spot': 'user.release_spot',
+    'dashboard_admin': 'admin.dashboard_admin',
+    'parking_statistics': 'stats.parking_statistics',
+    'view_users': 'admin.view_users',
+}
+
+
+class TestClientSession:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        return response.status_code, response.get_data(as_text=True)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect()
+        )
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req) as response:
+                return response.status, response.read().decode()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode(errors='replace')
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def timed(self, session, flow, method, path, data=None, ok=(200, 302)):
+        started = time.perf_counter()
+        status, text = session.request(method, path, data)
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.latencies[flow].append(elapsed)
+            if status not in ok:
+                self.errors[flow] += 1
+        return status, text
+
+
+def login(recorder, session, email, password):
+    _, page = session.request('GET', '/login')
+    token = re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', page)
+    data = {'email': email, 'password': password}
+    if token:
+        data['csrf_token'] = token.group(1)
+    status, _ = recorder.timed(session, 'login', 'POST', '/login', data, ok=(302,))
+    return status == 302
+
+
+def driver_flow(recorder, session, email, password, rng):
+    if not login(recorder, session, email, password):
+        return
+    _, page = recorder.timed(session, 'dashboard_user', 'GET', '/dashboard_user')
+    lot_ids = re.findall(r'book_spot\?lot_id=(\d+)', page)
+    if lot_ids:
+        lot_id = rng.choice(lot_ids)
+        recorder.timed(session, 'book_spot', 'GET', f'/book_spot?lot_id={lot_id}')
+        start = datetime.now() + timedelta(days=rng.randint(1, 30), minutes=rng.randrange(0, 1440))
+        recorder.timed(session, 'book_spot', 'POST', '/book_spot', {
+            'lot_id': lot_id,
+            'start_time': start.strftime('%Y-%m-%dT%H:%M'),
+            'end_time': (start + timedelta(hours=rng.randint(1, 4))).strftime('%Y-%m-%dT%H:%M'),
+        })
+        _, page = recorder.timed(session, 'dashboard_user', 'GET', '/dashboard_user')
+        release_ids = re.findall(r'/release_spot/(\d+)', page)
+        if release_ids:
+            recorder.timed(session, 'release_spot', 'POST', f'/release_spot/{release_ids[0]}')
+    session.request('GET', '/logout')
+
+
+def admin_flow(recorder, session, email, password, rng):
+    if not login(recorder, session, email, password):
+        return
+    recorder.timed(session, 'dashboard_admin', 'GET', '/dashboard_admin')
+    recorder.timed(session, 'parking_statistics', 'GET', '/parking_statistics')
+    recorder.timed(session, 'view_users', 'GET', '/view_users')
+    session.request('GET', '/logout')
+
+
+def read_metrics(session):
+    _, text = session.request('GET', '/metrics')
+    statements, requests = {}, {}
+    for name, endpoint, value in re.findall(r'^(parking_sql_statements_total|parking_request_duration_seconds_count)'
+                                            r'\{endpoint="([^"]+)"\} (\S+)$', text, re.M):
+        (statements if name == 'parking_sql_statements_total' else requests)[endpoint] = float(value)
+    return statements, requests
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder, before, after, wall_seconds):
+    flows = {}
+    for flow, endpoint in FLOWS.items():
+        values = sorted(recorder.latencies.get(flow, []))
+        if not values:
+            continue
+        requests = after[1].get(endpoint, 0) - before[1].get(endpoint, 0)
+        statements = after[0].get(endpoint, 0) - before[0].get(endpoint, 0)
+        flows[flow] = {
+            'count': len(values),
+            'errors': recorder.errors.get(flow, 0),
+            'p50_ms': round(percentile(values, 50) * 1000, 2),
+            'p95_ms': round(percentile(values, 95) * 1000, 2),
+            'p99_ms': round(percentile(values, 99) * 1000, 2),
+            'mean_ms': round(sum(values) / len(values) * 1000, 2),
+            'throughput_rps': round(len(values) / wall_seconds, 2),
+            'queries_per_request': round(statements / requests, 2) if requests else None,
+        }
+    total = sum(flow['count'] for flow in flows.values())
+    return {'wall_seconds': round(wall_seconds, 3), 'requests': total,
+            'throughput_rps': round(total / wall_seconds, 2), 'flows': flows}
+
+
+def print_report(report, previous=None):
+    print(f"{report['requests']} requests in {report['wall_seconds']}s ({report['throughput_rps']} req/s)")
+    print(f"{'flow':<20}{'count':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>8}{'q/req':>7}"
+          + (f"{'p95 vs prev':>13}" if previous else ''))
+    for flow, stats in report['flows'].items():
+        line = (f"{flow:<20}{stats['count']:>7}{stats['errors']:>5}{stats['p50_ms']:>9}{stats['p95_ms']:>9}"
+                f"{stats['p99_ms']:>9}{stats['throughput_rps']:>8}{str(stats['queries_per_request']):>7}")
+        old = previous['flows'].get(flow) if previous else None
+        if old and old['p95_ms']:
+            line += f"{(stats['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100:>+12.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', help='base URL of a running server; default drives the app in-process')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--admin-threads', type=int, default=1)
+    parser.add_argument('--iterations', type=int, default=20, help='flow iterations per thread')
+    parser.add_argument('--users', type=int, default=1000, help='seeded users to log in as (user1..userN)')
+    parser.add_argument('--password', default='password')
+    parser.add_argument('--admin-email', default='admin@ezpark.com')
+    parser.add_argument('--admin-password', default='admin')
+    parser.add_argument('--output', default=f'load_test_{datetime.now():%Y%m%d_%H%M%S}.json')
+    parser.add_argument('--compare', help='previous results JSON to compare p95 against')
+    args = parser.parse_args()
+
+    if args.url:
+        make_session = lambda: HttpSession(args.url)
+    else:
+        from app import create_app, setup_app
+        app = create_app()
+        setup_app(app)
+        make_session = lambda: TestClientSession(app)
+
+    recorder = Recorder()
+    probe = make_session()
+    before = read_metrics(probe)
+
+    def worker(index):
+        rng = random.Random(index)
+        session = make_session()
+        for _ in range(args.iterations):
+            if index < args.admin_threads:
+                admin_flow(recorder, session, args.admin_email, args.admin_password, rng)
+            else:
+                email = f'user{rng.randint(1, args.users)}@example.com'
+                driver_flow(recorder, session, email, args.password, rng)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall_seconds = time.perf_counter() - started
+
+    report = summarize(recorder, before, read_metrics(probe), wall_seconds)
+    report.update({
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'mode': 'http' if args.url else 'test_client',
+        'config': {k: v for k, v in vars(args).items() if 'password' not in k},
+    })
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_report(report, previous)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
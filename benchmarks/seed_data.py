@@ -0,0 +1,97 @@
+# Seeds the app database (DATABASE_URL, default instance/parking.db) with synthetic
+# users, lots, spots and historical reservations for load testing.
+# Usage: python benchmarks/seed_data.py [--users 1000] [--lots 50] [--spots 100] [--reservations 100000]
+# Every generated user is user<n>@example.com with the password given by --password.
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+from app import create_app, setup_app
+from models.models import db, User, ParkingLot, ParkingSpot, Reservation
+from controller.occupancy import reconcile_counts
+from controller.rollups import backfill
+
+BATCH_SIZE = 5000
+
+
+def insert_batches(table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            db.session.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--lots', type=int, default=50)
+    parser.add_argument('--spots', type=int, default=100, help='spots per lot')
+    parser.add_argument('--reservations', type=int, default=100000, help='historical (inactive) reservations')
+    parser.add_argument('--years', type=int, default=3, help='how far back the history goes')
+    parser.add_argument('--password', default='password')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    app = create_app()
+    setup_app(app)
+    with app.app_context():
+        started = time.perf_counter()
+        # One hash shared by every generated user; hashing per row would dominate seeding time
+        password = generate_password_hash(args.password, method='pbkdf2:sha256')
+        first_user = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+        insert_batches(User.__table__, (
+            {'fullname': f'User {n}', 'email': f'user{n}@example.com', 'password': password,
+             'phone': f'{9000000000 + n}', 'address': f'{n} Synthetic Street',
+             'pincode': f'{700000 + rng.randrange(100)}', 'is_admin': False}
+            for n in range(first_user, first_user + args.users)
+        ))
+
+        first_lot = (db.session.query(db.func.max(ParkingLot.id)).scalar() or 0) + 1
+        lot_ids = list(range(first_lot, first_lot + args.lots))
+        insert_batches(ParkingLot.__table__, (
+            {'id': lot_id, 'prime_location_name': f'Lot {lot_id}', 'address': f'{lot_id} Parking Road',
+             'pin_code': f'{700000 + rng.randrange(100)}', 'maximum_spots': args.spots,
+             'available_count': args.spots, 'occupied_count': 0}
+            for lot_id in lot_ids
+        ))
+        insert_batches(ParkingSpot.__table__, (
+            {'lot_id': lot_id, 'spot_number': n + 1, 'status': 'A'}
+            for lot_id in lot_ids for n in range(args.spots)
+        ))
+        db.session.flush()
+
+        spot_ids = [spot_id for (spot_id,) in
+                    db.session.query(ParkingSpot.id).filter(ParkingSpot.lot_id.in_(lot_ids))]
+        user_ids = range(first_user, first_user + args.users)
+        now = datetime.now()
+        history_minutes = args.years * 365 * 24 * 60
+
+        def reservations():
+            for _ in range(args.reservations):
+                start = now - timedelta(minutes=rng.randrange(60, history_minutes))
+                yield {'user_id': rng.choice(user_ids), 'spot_id': rng.choice(spot_ids), 'status': 'I',
+                       'start_time': start, 'end_time': start + timedelta(minutes=rng.randrange(30, 600))}
+
+        if args.users and spot_ids:
+            insert_batches(Reservation.__table__, reservations())
+        db.session.commit()
+
+        reconcile_counts()
+        backfill()
+        print(f'Seeded {args.users} users, {args.lots} lots x {args.spots} spots and '
+              f'{args.reservations} reservations in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
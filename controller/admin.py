@@ -0,0 +1,324 @@
+import json
+import logging
+from datetime import datetime
+from flask import Blueprint, Response, abort, current_app, render_template, redirect, url_for, flash, request, stream_with_context
+from flask_login import current_user, login_required
+from sqlalchemy import func, or_, select, union_all
+from models.models import db, User, ParkingLot, ParkingSpot, Reservation, ReservationArchive
+from controller.forms import AddLotForm
+from controller.auth import admin_required
+from controller.occupancy import track_change
+from controller.pagination import reservation_page, reservation_details
+from controller.provisioning import add_spots, remove_spots, has_bookings, booked_lot_ids
+from controller.rollups import booking_summary
+from controller.cache import lot_cache
+
+log = logging.getLogger('parking.app')
+
+admin_views = Blueprint('admin', __name__)
+
+USERS_PER_PAGE = 50
+RESERVATIONS_PER_PAGE = 50
+
+
+def history_filters():
+    # Booking history filters shared by dashboard_admin and the reservation export
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    try:
+        return {
+            'start': datetime.fromisoformat(start_date) if start_date else None,
+            'end': datetime.fromisoformat(end_date) if end_date else None,
+            'lot_id': request.args.get('location_id', type=int),
+        }
+    except ValueError:
+        abort(400, 'Dates must be in YYYY-MM-DD format.')
+
+@admin_views.route('/dashboard_admin', methods=['GET'])
+@login_required
+@admin_required
+def dashboard_admin():
+    lots = lot_cache.lots()
+
+    # Filters
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    location_id = request.args.get('location_id', type=int)
+
+    filtered_summary = booking_summary(**history_filters())
+    booked_lots = booked_lot_ids()
+
+    lot_data = []
+    for lot in lots:
+        lot_data.append({
+            'id': lot['id'],
+            'name': lot['prime_location_name'],
+            'address': lot['address'],
+            'pin_code': lot['pin_code'],
+            'total_spots': lot['available_count'] + lot['occupied_count'],
+            'available_spots': lot['available_count'],
+            'occupied_spots' : lot['occupied_count'],
+            'deletable': lot['occupied_count'] == 0 and lot['id'] not in booked_lots,
+        })
+
+    active_query = (
+        db.session.query(Reservation)
+        .filter_by(status='A')  # 'A' for Active
+        .join(Reservation.spot)
+        .join(ParkingSpot.lot)
+        .join(Reservation.user)
+        .options(
+            db.contains_eager(Reservation.spot).contains_eager(ParkingSpot.lot),
+            db.contains_eager(Reservation.user)
+        )
+    )
+    active_reservations, next_cursor = reservation_page(active_query, RESERVATIONS_PER_PAGE, request.args.get('cursor'))
+    log.debug('dashboard_admin lots=%d active_reservations=%d', len(lot_data), len(active_reservations))
+    overall_occupied = sum(lot['occupied_spots'] for lot in lot_data)
+    overall_available = sum(lot['available_spots'] for lot in lot_data)
+
+    return render_template(
+        'dashboard_admin.html',
+        lots=lot_data,
+        booked_lots=tuple(sorted(booked_lots)),
+        reservations=active_reservations,
+        next_cursor=next_cursor,
+        filtered_summary=filtered_summary,
+        overall_data=json.dumps({
+            'labels': ['Occupied', 'Available'],
+            'data': [overall_occupied, overall_available]
+        }),
+        filter_params={
+            'start_date': start_date or '',
+            'end_date': end_date or '',
+            'location_id': location_id or ''
+        }
+    )
+
+@admin_views.route('/current_users')
+@login_required
+@admin_required
+def current_users():
+    query = Reservation.query.options(*reservation_details()).filter(Reservation.status == 'A')
+    reservations, next_cursor = reservation_page(query, RESERVATIONS_PER_PAGE, request.args.get('cursor'))
+    return render_template('current_users.html', current_reservations=reservations, next_cursor=next_cursor)
+
+@admin_views.route('/add_lot', methods=['GET', 'POST'])
+@login_required
+def add_lot():
+    if not current_user.is_admin:
+        return redirect(url_for('user.home'))
+    form = AddLotForm()
+    if form.validate_on_submit():
+        lot = ParkingLot(
+            prime_location_name=form.prime_location_name.data,
+            address=form.address.data,
+            pin_code=form.pin_code.data,
+            maximum_spots=form.maximum_spots.data
+        )
+        db.session.add(lot)
+        db.session.flush()
+
+        add_spots(lot.id, form.maximum_spots.data)
+        db.session.commit()
+
+        flash('Parking Lot and Spots created.')
+        return redirect(url_for('admin.dashboard_admin'))
+    return render_template('add_lot.html', form=form)
+@admin_views.route('/add_spot', methods=['GET', 'POST'])
+@login_required
+def add_spot():
+    if not current_user.is_admin:
+        return redirect(url_for('user.home'))
+
+    lots = ParkingLot.query.all()
+
+    if request.method == 'POST':
+        lot_id = request.form.get('lot_id', type=int)
+        num_spots = request.form.get('num_spots', type=int)
+
+        lot = ParkingLot.query.get(lot_id)
+        if not num_spots or num_spots < 1:
+            flash('Number of spots must be at least 1.')
+        elif lot:
+            add_spots(lot.id, num_spots)
+            db.session.commit()
+            flash(f'{num_spots} spot(s) added to {lot.prime_location_name}.')
+            return redirect(url_for('admin.dashboard_admin'))
+        else:
+            flash('Selected parking lot not found.')
+
+    return render_template('add_spot.html', lots=lots)
+
+@admin_views.route('/lot/update/<int:lot_id>', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def update_lot(lot_id):
+    lot = ParkingLot.query.get_or_404(lot_id)
+
+    if request.method == 'POST':
+        lot.prime_location_name = request.form['prime_location_name']
+        lot.address = request.form['address']
+        lot.pin_code = request.form['pin_code']
+
+        try:
+            new_max_spots = int(request.form['maximum_spots'])
+        except ValueError:
+            flash('Maximum spots must be a valid number.', 'danger')
+            return redirect(url_for('admin.update_lot', lot_id=lot.id))
+
+        # Safety check 1: At least 1 spot
+        if new_max_spots < 1:
+            flash('A parking lot must have at least 1 spot.', 'danger')
+            return redirect(url_for('admin.update_lot', lot_id=lot.id))
+
+        # Safety check 2: Must be >= occupied spots
+        occupied_count = lot.occupied_count
+        if new_max_spots < occupied_count:
+            flash(f'Cannot set maximum spots below the number of currently occupied spots ({occupied_count}).', 'danger')
+            return redirect(url_for('admin.update_lot', lot_id=lot.id))
+
+        old_max_spots = lot.maximum_spots
+        lot.maximum_spots = new_max_spots
+        db.session.commit()  # save lot details first
+
+        current_spot_count = lot.available_count + lot.occupied_count
+
+        # Add spots if new max is higher
+        if new_max_spots > current_spot_count:
+
+            add_spots(lot.id, new_max_spots - current_spot_count)
+            db.session.commit()
+
+        # Remove available spots if new max is smaller
+        elif new_max_spots < current_spot_count:
+            spots_to_remove = current_spot_count - new_max_spots
+            removed = remove_spots(lot.id, spots_to_remove)
+            db.session.commit()
+            if removed < spots_to_remove:
+                flash(f'{spots_to_remove - removed} spot(s) kept because they have upcoming reservations.', 'warning')
+
+        flash('Parking lot and spots updated successfully!', 'success')
+        return redirect(url_for('admin.dashboard_admin'))
+
+    return render_template('update_lot.html', lot=lot)
+
+@admin_views.route('/lot/delete/<int:lot_id>', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def delete_lot(lot_id):
+    lot = ParkingLot.query.get_or_404(lot_id)
+
+    if request.method == 'POST':
+        # Upcoming reservations leave their spot free, so counters alone aren't enough
+        if lot.occupied_count > 0 or has_bookings(lot.id):
+            flash('Cannot delete the lot. It has active or upcoming reservations.', 'danger')
+            return redirect(url_for('admin.dashboard_admin'))
+
+        ParkingSpot.query.filter_by(lot_id=lot.id).delete()
+        track_change(lot.id, available=-lot.available_count)
+        db.session.delete(lot)
+        db.session.commit()
+        flash('Parking lot deleted successfully.', 'success')
+        return redirect(url_for('admin.dashboard_admin'))
+
+    return render_template('delete_lot.html', lot=lot)
+
+@admin_views.route('/admin/lot/<int:lot_id>/spots')
+@login_required
+@admin_required
+def view_spots(lot_id):
+    lot = ParkingLot.query.get_or_404(lot_id)
+    spots = ParkingSpot.query.filter_by(lot_id=lot_id).all()
+    return render_template('view_spots.html', lot=lot, spots=spots)
+
+@admin_views.route('/admin/import', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def bulk_import():
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        kind = request.form.get('kind')
+        if not upload or not upload.filename or kind not in ('lots', 'users'):
+            flash('Choose what to import and a CSV file.')
+            return redirect(url_for('admin.bulk_import'))
+        # Imported on first use; the importer pulls in multiprocessing for its hash pool
+        from controller.import_jobs import submit_import
+        job_id = submit_import(current_app._get_current_object(), kind, upload)
+        return redirect(url_for('admin.import_job', job_id=job_id))
+    return render_template('bulk_import.html', job=None)
+
+@admin_views.route('/admin/import/<job_id>')
+@login_required
+@admin_required
+def import_job(job_id):
+    from controller.import_jobs import import_status
+
+    job = import_status(current_app, job_id)
+    if job is None:
+        abort(404)
+    return render_template('bulk_import.html', job=job)
+
+@admin_views.route('/admin/export/reservations')
+@login_required
+@admin_required
+def export_reservations():
+    from controller.export import history_chunks, csv_stream, parquet_stream, parquet_available
+
+    # Streamed chunk by chunk from a server-side cursor, so memory use doesn't grow with history
+    export_format = request.args.get('format', 'csv')
+    if export_format == 'parquet' and not parquet_available():
+        return 'Parquet export needs pyarrow installed on the server.', 501
+    if export_format not in ('csv', 'parquet'):
+        return 'Unknown export format.', 400
+
+    chunks = history_chunks(**history_filters())
+    if export_format == 'csv':
+        body, mimetype = csv_stream(chunks), 'text/csv'
+    else:
+        body, mimetype = parquet_stream(chunks), 'application/vnd.apache.parquet'
+    filename = f"reservations_{datetime.now():%Y%m%d_%H%M%S}.{export_format}"
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename={filename}',
+    })
+
+@admin_views.route('/view_users')
+@login_required
+@admin_required
+def view_users():
+    search = request.args.get('q', '').strip()
+    after = request.args.get('after', type=int)
+
+    # Keyset page of user ids, so the cost depends on page size rather than user count
+    page_query = db.session.query(User.id).filter(User.is_admin == False)
+    if search:
+        pattern = f'%{search}%'
+        page_query = page_query.filter(or_(User.fullname.ilike(pattern), User.email.ilike(pattern)))
+    if after:
+        page_query = page_query.filter(User.id > after)
+    page_ids = page_query.order_by(User.id).limit(USERS_PER_PAGE + 1).subquery()
+
+    booked = union_all(*[
+        select(model.user_id, func.max(model.start_time).label('start_time'))
+        .where(model.user_id.in_(select(page_ids.c.id)))
+        .group_by(model.user_id)
+        for model in (Reservation, ReservationArchive)
+    ]).subquery()
+    last_booked = (
+        db.session.query(booked.c.user_id, func.max(booked.c.start_time).label('last_booked'))
+        .group_by(booked.c.user_id)
+        .subquery()
+    )
+    rows = (
+        db.session.query(User, last_booked.c.last_booked)
+        .join(page_ids, page_ids.c.id == User.id)
+        .outerjoin(last_booked, last_booked.c.user_id == User.id)
+        .order_by(User.id)
+        .all()
+    )
+
+    next_after = rows[USERS_PER_PAGE - 1][0].id if len(rows) > USERS_PER_PAGE else None
+    user_data = [{'user': user, 'last_booked': last} for user, last in rows[:USERS_PER_PAGE]]
+
+    return render_template('view_users.html', user_data=user_data, search=search,
+                           after=after, next_after=next_after)
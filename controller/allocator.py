@@ -0,0 +1,144 @@
+from datetime import datetime
+from sqlalchemy import and_, exists, not_
+from models.models import db, ParkingLot, ParkingSpot, Reservation
+from controller.occupancy import adjust_counts, reconcile_counts, track_change
+from controller.rollups import record_booking, record_release
+
+MAX_CLAIM_ATTEMPTS = 5
+
+
+def reserve_capacity(lot_id):
+    # Conditional UPDATE on the lot counter: only one writer can take the last free spot
+    reserved = ParkingLot.query.filter(
+        ParkingLot.id == lot_id, ParkingLot.available_count > 0
+    ).update({
+        ParkingLot.available_count: ParkingLot.available_count - 1,
+        ParkingLot.occupied_count: ParkingLot.occupied_count + 1,
+    }, synchronize_session=False)
+    if reserved:
+        track_change(lot_id, available=-1, occupied=1)
+    return reserved == 1
+
+
+def lock_lot(lot_id):
+    # No-op UPDATE that takes the lot's row (SQLite: database) write lock until commit,
+    # so two bookings for the same lot can't both see a window as free
+    ParkingLot.query.filter_by(id=lot_id).update(
+        {ParkingLot.maximum_spots: ParkingLot.maximum_spots}, synchronize_session=False
+    )
+
+
+def overlaps(start_time, end_time):
+    # Active reservations on the spot whose [start_time, end_time) intersects the window;
+    # answered from the (spot_id, start_time, end_time) index
+    return exists().where(and_(
+        Reservation.spot_id == ParkingSpot.id,
+        Reservation.status == 'A',
+        Reservation.start_time < end_time,
+        Reservation.end_time > start_time,
+    ))
+
+
+def free_spot_query(lot_id, start_time, end_time):
+    return (
+        db.session.query(ParkingSpot.id)
+        .filter(ParkingSpot.lot_id == lot_id)
+        .filter(not_(overlaps(start_time, end_time)))
+    )
+
+
+# Booking rules shared by book_spot and the JSON API; returns an error message or None
+def booking_window_error(start_time, end_time, now):
+    if start_time < now.replace(second=0, microsecond=0):
+        return "Start time cannot be in the past."
+    if end_time <= start_time:
+        return "End time must be after start time."
+    return None
+
+
+# Returns the id of a spot with no active reservation overlapping the window,
+# or None when the lot is full for that window. A window that has already
+# started also occupies the spot right away. The caller commits.
+def claim_spot(lot_id, start_time, end_time, now=None):
+    now = now or datetime.now()
+    starts_now = start_time <= now
+
+    if starts_now:
+        if not reserve_capacity(lot_id):
+            return None
+    else:
+        lock_lot(lot_id)
+
+    for _ in range(MAX_CLAIM_ATTEMPTS):
+        query = free_spot_query(lot_id, start_time, end_time)
+        if starts_now:
+            query = query.filter(ParkingSpot.status == 'A')
+        spot_id = query.order_by(ParkingSpot.spot_number).limit(1).scalar()
+        if spot_id is None:
+            break
+        if not starts_now:
+            return spot_id
+        # Another request may have flipped this spot since we read it; retry if so
+        claimed = ParkingSpot.query.filter_by(id=spot_id, status='A').update(
+            {ParkingSpot.status: 'O'}, synchronize_session=False
+        )
+        if claimed == 1:
+            return spot_id
+
+    db.session.rollback()
+    return None
+
+
+def create_reservation(user_id, lot_id, start_time, end_time, now=None):
+    spot_id = claim_spot(lot_id, start_time, end_time, now=now)
+    if spot_id is None:
+        return None
+    reservation = Reservation(user_id=user_id, spot_id=spot_id, start_time=start_time, end_time=end_time)
+    db.session.add(reservation)
+    record_booking(lot_id, start_time, end_time)
+    return reservation
+
+
+def release_reservation(reservation, now=None):
+    # Conditional UPDATEs, like reserve_capacity: when two releases race (a double
+    # click, the API, the expiry worker) only the one that flips the row moves the
+    # counters and the rollups. Returns False if it was already released.
+    now = now or datetime.now()
+    old_end_time = reservation.end_time
+    # Only a reservation whose window has started holds the spot right now;
+    # one cancelled before it began never occupied it
+    started = reservation.start_time <= now
+    end_time = min(now, old_end_time) if started else reservation.start_time
+    released = Reservation.query.filter_by(id=reservation.id, status='A').update(
+        {Reservation.status: 'I', Reservation.end_time: end_time}
+    )
+    if released != 1:
+        return False
+
+    lot_id = reservation.spot.lot_id
+    if started:
+        freed = ParkingSpot.query.filter_by(id=reservation.spot_id, status='O').update(
+            {ParkingSpot.status: 'A'}
+        )
+        if freed == 1:
+            adjust_counts(lot_id, available=1, occupied=-1)
+    record_release(lot_id, end_time, old_end_time)
+    return True
+
+
+def activate_reservations(now=None):
+    # Mark spots occupied once a future reservation's window has begun
+    now = now or datetime.now()
+    covering = exists().where(and_(
+        Reservation.spot_id == ParkingSpot.id,
+        Reservation.status == 'A',
+        Reservation.start_time <= now,
+        Reservation.end_time > now,
+    ))
+    activated = ParkingSpot.query.filter(ParkingSpot.status == 'A', covering).update(
+        {ParkingSpot.status: 'O'}, synchronize_session=False
+    )
+    db.session.commit()
+    if activated:
+        reconcile_counts()
+    return activated
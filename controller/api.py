@@ -0,0 +1,165 @@
+from datetime import datetime
+from flask import Blueprint, jsonify, request
+from flask_login import current_user
+from sqlalchemy.orm import joinedload
+from models.models import db, ParkingLot, ParkingSpot, Reservation
+from controller.allocator import booking_window_error, create_reservation, release_reservation
+from controller.cache import lot_cache
+from controller.pagination import reservation_page
+from controller.proximity import nearest_lots
+
+# JSON endpoints for kiosks and mobile clients. GETs carry a content ETag so
+# pollers get 304 Not Modified instead of a re-rendered page. No Last-Modified:
+# nothing here knows when another process last changed a lot, and a guessed
+# date would answer If-Modified-Since with a stale 304.
+api = Blueprint('api', __name__, url_prefix='/api')
+
+RESERVATIONS_PER_PAGE = 50
+
+
+def error(message, status):
+    return jsonify({'error': message}), status
+
+
+@api.before_request
+def require_login():
+    # JSON 401 instead of flask_login's redirect to the HTML login page
+    if not current_user.is_authenticated:
+        return error('Authentication required.', 401)
+
+
+@api.before_request
+def require_json():
+    # The session cookie authenticates these calls, so a plain cross-site form must
+    # not be able to drive them: a JSON content type can't be posted cross-origin
+    # without a CORS preflight, which this API never answers
+    if request.method not in ('GET', 'HEAD', 'OPTIONS') and not request.is_json:
+        return error('Send a JSON body with Content-Type: application/json.', 415)
+
+
+def conditional(payload, private=False):
+    response = jsonify(payload)
+    response.add_etag()
+    # Clients may keep a copy but must revalidate it on every poll
+    response.headers['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+    return response.make_conditional(request)
+
+
+def lot_json(lot):
+    return {
+        'id': lot['id'],
+        'name': lot['prime_location_name'],
+        'address': lot['address'],
+        'pin_code': lot['pin_code'],
+        'available': lot['available_count'],
+        'occupied': lot['occupied_count'],
+    }
+
+
+def reservation_json(reservation):
+    spot = reservation.spot
+    return {
+        'id': reservation.id,
+        'lot_id': spot.lot_id,
+        'lot_name': spot.lot.prime_location_name,
+        'spot_number': spot.spot_number,
+        'start_time': reservation.start_time.isoformat(),
+        'end_time': reservation.end_time.isoformat() if reservation.end_time else None,
+        'status': 'active' if reservation.status == 'A' else 'released',
+    }
+
+
+def parse_time(value):
+    # ISO 8601. Times with an offset are converted to the server's local time,
+    # which is what reservations are stored and compared in
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+@api.route('/lots')
+def lots():
+    # Served from the availability cache
+    return conditional({'lots': [lot_json(lot) for lot in lot_cache.lots()]})
+
+
+@api.route('/lots/nearest')
+def nearest():
+    pin = request.args.get('pin') or current_user.pincode
+    if not pin:
+        return error('pin is required.', 400)
+    k = min(max(request.args.get('k', 5, type=int), 1), 50)
+    return conditional({'lots': [lot_json(lot) for lot in nearest_lots(pin, k)]}, private=True)
+
+
+@api.route('/lots/<int:lot_id>')
+def lot(lot_id):
+    for entry in lot_cache.lots():
+        if entry['id'] == lot_id:
+            return conditional(lot_json(entry))
+    return error('Parking lot not found.', 404)
+
+
+@api.route('/reservations')
+def reservations():
+    query = (
+        Reservation.query
+        .options(joinedload(Reservation.spot).joinedload(ParkingSpot.lot))
+        .filter_by(user_id=current_user.id)
+    )
+    if request.args.get('status') == 'active':
+        query = query.filter_by(status='A')
+    rows, next_cursor = reservation_page(query, RESERVATIONS_PER_PAGE, request.args.get('cursor'))
+    return conditional({'reservations': [reservation_json(r) for r in rows], 'next_cursor': next_cursor},
+                       private=True)
+
+
+@api.route('/reservations', methods=['POST'])
+def book():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return error('Expected a JSON object.', 400)
+    try:
+        lot = db.session.get(ParkingLot, int(data.get('lot_id')))
+    except (TypeError, ValueError):
+        return error('lot_id is required.', 400)
+    if lot is None:
+        return error('Parking lot not found.', 404)
+
+    start_time = parse_time(data.get('start_time'))
+    end_time = parse_time(data.get('end_time'))
+    if start_time is None or end_time is None:
+        return error('Invalid date format.', 400)
+
+    now = datetime.now()
+    message = booking_window_error(start_time, end_time, now)
+    if message:
+        return error(message, 400)
+
+    reservation = create_reservation(current_user.id, lot.id, start_time, end_time, now=now)
+    if reservation is None:
+        return error('No spots available for the selected time.', 409)
+    db.session.commit()
+    return jsonify(reservation_json(reservation)), 201
+
+
+@api.route('/reservations/<int:reservation_id>/release', methods=['POST'])
+def release(reservation_id):
+    reservation = db.session.get(Reservation, reservation_id)
+    if reservation is None:
+        return error('Reservation not found.', 404)
+    if reservation.user_id != current_user.id:
+        return error('You are not authorized to release this reservation.', 403)
+    if reservation.status != 'A':
+        return error('This spot is already released.', 409)
+
+    if not release_reservation(reservation):
+        db.session.rollback()
+        return error('This spot is already released.', 409)
+    db.session.commit()
+    return jsonify(reservation_json(reservation))
+
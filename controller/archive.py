@@ -0,0 +1,43 @@
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import DateTime, func, insert, literal, select
+from models.models import db, Reservation, ReservationArchive
+
+log = logging.getLogger('parking.archive')
+
+ARCHIVE_COLUMNS = ('id', 'user_id', 'spot_id', 'start_time', 'end_time', 'status')
+
+
+def archive_reservations(horizon_days=365, batch_size=1000, now=None):
+    # Moves released reservations that ended more than horizon_days ago into
+    # reservation_archive, one batch per transaction. Rollups already hold their
+    # bookings and minutes, so statistics are unaffected.
+    now = now or datetime.now()
+    cutoff = now - timedelta(days=horizon_days)
+    # SQLite hands out max(id) + 1 to new rows, so the newest reservation always
+    # stays hot: archiving it would let its id be reused while the archive holds it
+    newest = db.session.query(func.max(Reservation.id)).scalar()
+    archived_total = 0
+    while newest:
+        ids = [reservation_id for (reservation_id,) in (
+            db.session.query(Reservation.id)
+            .filter(Reservation.status == 'I', Reservation.end_time < cutoff, Reservation.id < newest)
+            .order_by(Reservation.id)
+            .limit(batch_size)
+        )]
+        if not ids:
+            break
+
+        columns = [getattr(Reservation, name) for name in ARCHIVE_COLUMNS]
+        db.session.execute(
+            insert(ReservationArchive).from_select(
+                list(ARCHIVE_COLUMNS) + ['archived_at'],
+                select(*columns, literal(now, DateTime())).where(Reservation.id.in_(ids)),
+            )
+        )
+        Reservation.query.filter(Reservation.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+        archived_total += len(ids)
+        log.info('archived %d reservation(s) ended before %s', archived_total, cutoff)
+    return archived_total
@@ -0,0 +1,35 @@
+from functools import wraps
+from flask import redirect, url_for, flash
+from flask_login import LoginManager, current_user
+from models.models import db, User
+from controller.cache import cached_user
+from controller.passwords import password_hasher
+
+login_manager = LoginManager()
+login_manager.login_view = 'user.login'
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    # Served from user_cache; commits that touch a user drop their entry
+    return cached_user(int(user_id))
+
+
+def seed_admin():
+    # Creates the default admin account unless it exists; safe to call on every upgrade
+    if User.query.filter_by(email='admin@ezpark.com').first():
+        return False
+    admin = User(fullname='Admin', email='admin@ezpark.com', password=password_hasher.hash('admin'), is_admin=True)
+    db.session.add(admin)
+    db.session.commit()
+    return True
+
+
+def admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_admin:
+            flash('You do not have permission to access this page.', 'danger')
+            return redirect(url_for('user.login'))
+        return f(*args, **kwargs)
+    return decorated_function
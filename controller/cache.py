@@ -0,0 +1,245 @@
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from models.models import db, ParkingLot, ParkingSpot, User
+
+WATCHED_TABLES = ('parking_lot', 'parking_spot')
+STATISTICS_TABLES = ('hourly_rollup', 'daily_rollup')
+
+
+class LocalCache:
+    # Default in-process backend. Any object with get/set/delete of the same
+    # shape (e.g. a thin Redis wrapper) can be passed to AvailabilityCache instead.
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class AvailabilityCache:
+    KEY = 'lot_availability'
+    KEY_BY_ID = 'lot_availability_by_id'
+
+    def __init__(self, backend=None, ttl=30):
+        self.backend = backend or LocalCache()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def configure(self, backend=None, ttl=None):
+        if backend is not None:
+            self.backend = backend
+        if ttl is not None:
+            self.ttl = ttl
+
+    def lots(self):
+        cached = self.backend.get(self.KEY)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        lots = [
+            {
+                'id': lot.id,
+                'prime_location_name': lot.prime_location_name,
+                'address': lot.address,
+                'pin_code': lot.pin_code,
+                'available_count': lot.available_count,
+                'occupied_count': lot.occupied_count,
+            }
+            for lot in ParkingLot.query.order_by(ParkingLot.id).all()
+        ]
+        self.backend.set(self.KEY, lots, self.ttl)
+        return lots
+
+    def by_id(self):
+        # Same cached data keyed by lot id, rebuilt alongside the list
+        lots = self.lots()
+        indexed = self.backend.get(self.KEY_BY_ID)
+        if indexed is None or indexed[0] is not lots:
+            indexed = (lots, {lot['id']: lot for lot in lots})
+            self.backend.set(self.KEY_BY_ID, indexed, self.ttl)
+        return indexed[1]
+
+    def invalidate(self):
+        self.invalidations += 1
+        self.backend.delete(self.KEY)
+        self.backend.delete(self.KEY_BY_ID)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else None,
+            'ttl': self.ttl,
+        }
+
+
+lot_cache = AvailabilityCache()
+
+
+class LRUCache:
+    # Bounded in-process cache: least recently used entries are evicted past
+    # max_size, and entries expire after ttl seconds regardless
+    def __init__(self, max_size=1024, ttl=60):
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, max_size=None, ttl=None):
+        if max_size is not None:
+            self.max_size = max_size
+        if ttl is not None:
+            self.ttl = ttl
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else None,
+            'ttl': self.ttl,
+        }
+
+
+user_cache = LRUCache()
+
+
+class DataVersions:
+    # Counters bumped when a commit changes a data set ('lots' for lot and spot
+    # counts, 'statistics' for the rollups). Cached renders key on them so a change
+    # makes new keys instead of having to find and delete old entries. Templates
+    # read them as versions.lots / versions.statistics.
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def bump(self, name):
+        with self._lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+
+    def __getitem__(self, name):
+        return self._versions.get(name, 0)
+
+
+data_versions = DataVersions()
+USER_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+
+
+def cached_user(user_id):
+    # The cache holds plain column values, never session-bound objects. A hit is
+    # merged into the current session without a SELECT, so the result behaves like
+    # a loaded User (edits flush as an UPDATE, relationships lazy-load).
+    values = user_cache.get(user_id)
+    if values is None:
+        user = db.session.get(User, user_id)
+        if user is not None:
+            user_cache.set(user_id, {key: getattr(user, key) for key in USER_COLUMNS})
+        return user
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+# Any committed write to lots or spots, through the unit of work or a bulk
+# UPDATE/INSERT/DELETE, drops the cached availability; committed user changes
+# drop those users' cached identities
+@event.listens_for(Session, 'after_flush')
+def _track_flush(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (ParkingLot, ParkingSpot)):
+            session.info['lots_changed'] = True
+        elif isinstance(obj, User) and obj.id is not None:
+            session.info.setdefault('users_changed', set()).add(obj.id)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk_write(orm_execute_state):
+    statement = orm_execute_state.statement
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        table = getattr(statement, 'table', None)
+        if table is not None and table.name in WATCHED_TABLES:
+            orm_execute_state.session.info['lots_changed'] = True
+        elif table is not None and table.name == User.__tablename__:
+            orm_execute_state.session.info['all_users_changed'] = True
+        elif table is not None and table.name in STATISTICS_TABLES:
+            orm_execute_state.session.info['statistics_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('lots_changed', False):
+        lot_cache.invalidate()
+        data_versions.bump('lots')
+    if session.info.pop('statistics_changed', False):
+        data_versions.bump('statistics')
+    if session.info.pop('all_users_changed', False):
+        user_cache.clear()
+    for user_id in session.info.pop('users_changed', ()):
+        user_cache.delete(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_on_rollback(session):
+    session.info.pop('lots_changed', None)
+    session.info.pop('users_changed', None)
+    session.info.pop('all_users_changed', None)
+    session.info.pop('statistics_changed', None)
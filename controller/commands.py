@@ -0,0 +1,102 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from models.migrations import upgrade, current_version
+from controller.auth import seed_admin
+from controller.allocator import activate_reservations
+from controller.expiry import run_expiry_cycle
+from controller.occupancy import reconcile_counts
+from controller.rollups import backfill
+
+# The importer and archiver are imported by the commands that use them, so web
+# workers never load them
+
+
+@click.command('db-upgrade')
+@with_appcontext
+def db_upgrade():
+    applied = upgrade()
+    for version, name in applied:
+        click.echo(f'Applied migration {version}: {name}')
+    if seed_admin():
+        click.echo('Created the admin account.')
+    click.echo(f'Database is at schema version {current_version()}.')
+
+@click.command('reconcile-occupancy')
+@click.option('--dry-run', is_flag=True, help='Report drift without repairing it.')
+@with_appcontext
+def reconcile_occupancy(dry_run):
+    drift = reconcile_counts(repair=not dry_run)
+    for d in drift:
+        click.echo(f"Lot {d['lot_id']}: stored available/occupied {d['stored']}, actual {d['actual']}")
+    if not drift:
+        click.echo('Occupancy counters are consistent.')
+    elif not dry_run:
+        click.echo(f'Repaired {len(drift)} lot(s).')
+
+@click.command('backfill-rollups')
+@with_appcontext
+def backfill_rollups():
+    buckets = backfill()
+    for table, n in buckets.items():
+        click.echo(f'{table}: {n} bucket(s) rebuilt.')
+
+@click.command('activate-reservations')
+@with_appcontext
+def activate_reservations_command():
+    activated = activate_reservations()
+    click.echo(f'{activated} spot(s) marked occupied.')
+
+@click.command('import-lots', help='Create lots and their spots from a CSV with columns '
+                                   'prime_location_name, address, pin_code, maximum_spots.')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@with_appcontext
+def import_lots_command(path):
+    from controller.importer import import_lots
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        report_import(import_lots(f))
+
+@click.command('import-users', help='Register users from a CSV with columns '
+                                    'fullname, email, phone, password, address, pincode.')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--hash-method', default=None, help='Password hash method; defaults to PASSWORD_HASH_METHOD.')
+@click.option('--workers', type=int, default=None, help='Hashing processes; defaults to the CPU count.')
+@with_appcontext
+def import_users_command(path, hash_method, workers):
+    from controller.importer import import_users
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        report_import(import_users(f, hash_method or current_app.config['PASSWORD_HASH_METHOD'], workers))
+
+def report_import(report):
+    for line, message in report.errors:
+        click.echo(f'line {line}: {message}', err=True)
+    if report.failed > len(report.errors):
+        click.echo(f'... {report.failed - len(report.errors)} more error(s)', err=True)
+    click.echo(f'{report.imported} of {report.rows} row(s) imported, {report.failed} failed.')
+
+@click.command('expire-reservations')
+@with_appcontext
+def expire_reservations_command():
+    expired, activated = run_expiry_cycle(current_app.config['EXPIRY_BATCH_SIZE'])
+    click.echo(f'{expired} reservation(s) expired, {activated} spot(s) marked occupied.')
+
+@click.command('archive-reservations')
+@click.option('--horizon-days', type=int, default=None, help='Archive released reservations that ended this many days ago; defaults to ARCHIVE_AFTER_DAYS.')
+@click.option('--batch-size', type=int, default=None, help='Reservations moved per transaction; defaults to ARCHIVE_BATCH_SIZE.')
+@with_appcontext
+def archive_reservations_command(horizon_days, batch_size):
+    from controller.archive import archive_reservations
+    archived = archive_reservations(horizon_days or current_app.config['ARCHIVE_AFTER_DAYS'],
+                                    batch_size or current_app.config['ARCHIVE_BATCH_SIZE'])
+    click.echo(f'{archived} reservation(s) archived.')
+
+
+COMMANDS = (
+    db_upgrade, reconcile_occupancy, backfill_rollups, activate_reservations_command,
+    import_lots_command, import_users_command, expire_reservations_command, archive_reservations_command,
+)
+
+
+def register_commands(app):
+    for command in COMMANDS:
+        app.cli.add_command(command)
@@ -0,0 +1,107 @@
+import json
+import logging
+import queue
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+log = logging.getLogger('parking.events')
+
+# Seconds between keep-alive comments on an idle stream
+KEEPALIVE_SECONDS = 15
+# Milliseconds the browser waits before reconnecting a closed stream
+RECONNECT_MS = 2000
+
+
+class OccupancyBroker:
+    # In-process pub/sub: each subscriber gets its own bounded queue so one slow
+    # client can't hold up publishers or the other subscribers
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.max_pending)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Too far behind to catch up from deltas; tell it to reload a snapshot
+                self._reset(subscriber)
+
+    def _reset(self, subscriber):
+        try:
+            while True:
+                subscriber.get_nowait()
+        except queue.Empty:
+            pass
+        subscriber.put_nowait(('resync', {}))
+        log.info('occupancy subscriber fell behind, asked to resync')
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+occupancy_broker = OccupancyBroker()
+
+
+def format_event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data)}\n\n'
+
+
+def occupancy_stream(snapshot, lifetime=300):
+    # SSE body: a full snapshot first, then one 'delta' event per committed change.
+    # Ends after `lifetime` seconds so a tab never holds a worker for good;
+    # EventSource reconnects on its own and gets a fresh snapshot.
+    subscriber = occupancy_broker.subscribe()
+    deadline = time.monotonic() + lifetime
+    try:
+        yield f'retry: {RECONNECT_MS}\n'
+        yield format_event('snapshot', snapshot)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                name, data = subscriber.get(timeout=min(KEEPALIVE_SECONDS, remaining))
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            yield format_event(name, data)
+    finally:
+        occupancy_broker.unsubscribe(subscriber)
+
+
+# Counter changes recorded by controller.occupancy.track_change are published
+# only once their transaction commits
+@event.listens_for(Session, 'after_commit')
+def _publish_on_commit(session):
+    deltas = session.info.pop('occupancy_deltas', None)
+    if not deltas:
+        return
+    lots = [
+        {'id': lot_id, 'available': available, 'occupied': occupied}
+        for lot_id, (available, occupied) in sorted(deltas.items())
+        if available or occupied
+    ]
+    if lots:
+        occupancy_broker.publish(('delta', {'lots': lots}))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('occupancy_deltas', None)
@@ -0,0 +1,76 @@
+import logging
+import threading
+from datetime import datetime
+from sqlalchemy import and_, exists, not_, select
+from models.models import db, ParkingSpot, Reservation
+from controller.allocator import activate_reservations
+from controller.occupancy import reconcile_counts
+
+log = logging.getLogger('parking.expiry')
+
+
+def expire_reservations(now=None, batch_size=500):
+    # Set-based release of reservations whose end_time has passed, one batch per transaction
+    now = now or datetime.now()
+    expired_total = 0
+    while True:
+        ids = [reservation_id for (reservation_id,) in (
+            db.session.query(Reservation.id)
+            .filter(Reservation.status == 'A', Reservation.end_time <= now)
+            .limit(batch_size)
+        )]
+        if not ids:
+            break
+
+        spot_ids = select(Reservation.spot_id).where(Reservation.id.in_(ids))
+        lot_ids = [lot_id for (lot_id,) in (
+            db.session.query(ParkingSpot.lot_id).filter(ParkingSpot.id.in_(spot_ids)).distinct()
+        )]
+        # status='A' again: a user may have released one since it was selected
+        Reservation.query.filter(Reservation.id.in_(ids), Reservation.status == 'A').update(
+            {Reservation.status: 'I'}, synchronize_session=False
+        )
+        # Free the spot unless another active reservation already covers now
+        still_covered = exists().where(and_(
+            Reservation.spot_id == ParkingSpot.id,
+            Reservation.status == 'A',
+            Reservation.start_time <= now,
+            Reservation.end_time > now,
+        ))
+        ParkingSpot.query.filter(
+            ParkingSpot.id.in_(spot_ids), ParkingSpot.status == 'O', not_(still_covered)
+        ).update({ParkingSpot.status: 'A'}, synchronize_session=False)
+        db.session.commit()
+
+        reconcile_counts(lot_ids=lot_ids)
+        expired_total += len(ids)
+    return expired_total
+
+
+def run_expiry_cycle(batch_size=500):
+    expired = expire_reservations(batch_size=batch_size)
+    activated = activate_reservations()
+    return expired, activated
+
+
+def start_expiry_worker(app):
+    interval = app.config['EXPIRY_INTERVAL']
+    batch_size = app.config['EXPIRY_BATCH_SIZE']
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            with app.app_context():
+                try:
+                    expired, activated = run_expiry_cycle(batch_size)
+                    if expired or activated:
+                        log.info('Expired %d reservation(s), activated %d spot(s)', expired, activated)
+                except Exception:
+                    db.session.rollback()
+                    log.exception('Reservation expiry cycle failed')
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=loop, name='reservation-expiry', daemon=True)
+    thread.start()
+    return stop
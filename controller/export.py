@@ -0,0 +1,148 @@
+import csv
+import io
+from sqlalchemy import select
+from models.models import db, ParkingLot, ParkingSpot, Reservation, ReservationArchive, User
+
+# Rows fetched from the cursor and written out per chunk (and per Parquet row group)
+CHUNK_SIZE = 5000
+
+def columns(model):
+    return [
+        ('reservation_id', model.id),
+        ('status', model.status),
+        ('start_time', model.start_time),
+        ('end_time', model.end_time),
+    ] + COLUMNS
+
+
+COLUMNS = [
+    ('user_id', User.id),
+    ('user_name', User.fullname),
+    ('user_email', User.email),
+    ('user_phone', User.phone),
+    ('lot_id', ParkingLot.id),
+    ('lot_name', ParkingLot.prime_location_name),
+    ('lot_address', ParkingLot.address),
+    ('lot_pin_code', ParkingLot.pin_code),
+    ('spot_number', ParkingSpot.spot_number),
+]
+HEADER = [name for name, _ in columns(Reservation)]
+
+# Leading characters that make a spreadsheet read a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def export_statement(start=None, end=None, lot_id=None, model=Reservation):
+    # Same filters as dashboard_admin's booking history; outer join on user keeps
+    # reservations whose user has been removed
+    statement = (
+        select(*[column.label(name) for name, column in columns(model)])
+        .select_from(model)
+        .join(ParkingSpot, model.spot_id == ParkingSpot.id)
+        .join(ParkingLot, ParkingSpot.lot_id == ParkingLot.id)
+        .outerjoin(User, model.user_id == User.id)
+        .order_by(model.id)
+    )
+    if start:
+        statement = statement.where(model.start_time >= start)
+    if end:
+        statement = statement.where(model.start_time <= end)
+    if lot_id:
+        statement = statement.where(ParkingLot.id == lot_id)
+    return statement
+
+
+def row_chunks(statement, chunk_size=CHUNK_SIZE):
+    # Server-side cursor on a dedicated connection: only one chunk is in memory at a time
+    with db.engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(statement)
+        for rows in result.partitions():
+            yield rows
+
+
+def history_chunks(start=None, end=None, lot_id=None, chunk_size=CHUNK_SIZE):
+    # Archived reservations first, then the hot table
+    for model in (ReservationArchive, Reservation):
+        yield from row_chunks(export_statement(start, end, lot_id, model), chunk_size)
+
+
+def spreadsheet_safe(value):
+    # Names and addresses are user input; a leading ' keeps =HYPERLINK(...) and the like as text
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_stream(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADER)
+    for rows in chunks:
+        writer.writerows([spreadsheet_safe(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+class ChunkSink(io.RawIOBase):
+    # Write-only file that hands back what was written since the last drain()
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def parquet_stream(chunks):
+    # One row group per chunk, flushed to the client as soon as it is written
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('reservation_id', pa.int64()),
+        ('status', pa.string()),
+        ('start_time', pa.timestamp('us')),
+        ('end_time', pa.timestamp('us')),
+        ('user_id', pa.int64()),
+        ('user_name', pa.string()),
+        ('user_email', pa.string()),
+        ('user_phone', pa.string()),
+        ('lot_id', pa.int64()),
+        ('lot_name', pa.string()),
+        ('lot_address', pa.string()),
+        ('lot_pin_code', pa.string()),
+        ('spot_number', pa.int64()),
+    ])
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    for rows in chunks:
+        columns = list(zip(*rows))
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+        ))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
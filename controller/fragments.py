@@ -0,0 +1,41 @@
+from jinja2 import nodes
+from jinja2.ext import Extension
+from controller.cache import LRUCache
+
+# Rendered template fragments, keyed by the {% cache %} tag's arguments
+fragment_cache = LRUCache(max_size=256, ttl=30)
+
+
+class FragmentCacheExtension(Extension):
+    # {% cache 'name', versions.lots, other_key %} ... {% endcache %}
+    # renders the body once per distinct key and reuses the HTML afterwards.
+    # Anything the body depends on has to be part of the key; expensive loading
+    # can happen inside the body so it is skipped on a hit as well.
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render', [nodes.List(key)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, key, caller):
+        key = tuple(key)
+        html = fragment_cache.get(key)
+        if html is None:
+            html = caller()
+            fragment_cache.set(key, html)
+        return html
+
+
+def precompile_templates(app):
+    # Parse and compile every template up front so the first request for each
+    # page doesn't pay for it; Jinja keeps them in its template cache
+    names = app.jinja_env.list_templates(filter_func=lambda name: name.endswith('.html'))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
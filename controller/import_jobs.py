@@ -0,0 +1,89 @@
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from models.models import db
+from controller.importer import ImportReport, import_lots, import_users, text_stream
+
+log = logging.getLogger('parking.importer')
+
+# Uploads run here, off the request thread, one at a time per process: a user
+# import already fans its hashing out to IMPORT_HASH_WORKERS processes
+runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bulk-import')
+
+JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+# How long a finished job's status page stays available
+JOB_RETENTION_SECONDS = 7 * 24 * 3600
+
+
+def job_path(app, job_id, extension):
+    return os.path.join(app.instance_path, 'imports', f'{job_id}.{extension}')
+
+
+def write_status(app, job_id, status):
+    # Kept on disk rather than in memory so any worker process can serve the status page
+    path = job_path(app, job_id, 'json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(status, f)
+    os.replace(path + '.tmp', path)
+
+
+def import_status(app, job_id):
+    if not JOB_ID.match(job_id):
+        return None
+    try:
+        with open(job_path(app, job_id, 'json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def prune_jobs(directory, now=None):
+    # Status files (and uploads a crashed process never got to) older than the retention
+    cutoff = (now or time.time()) - JOB_RETENTION_SECONDS
+    for entry in os.scandir(directory):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass  # pruned by another worker
+
+
+def submit_import(app, kind, upload):
+    job_id = uuid.uuid4().hex
+    directory = os.path.join(app.instance_path, 'imports')
+    os.makedirs(directory, exist_ok=True)
+    prune_jobs(directory)
+    upload.save(job_path(app, job_id, 'csv'))
+    write_status(app, job_id, {'kind': kind, 'state': 'queued'})
+    runner.submit(run_import, app, job_id, kind)
+    return job_id
+
+
+def run_import(app, job_id, kind):
+    report = ImportReport()
+    error = None
+    write_status(app, job_id, {'kind': kind, 'state': 'running'})
+    with app.app_context():
+        try:
+            with open(job_path(app, job_id, 'csv'), 'rb') as f:
+                stream = text_stream(f)
+                if kind == 'lots':
+                    import_lots(stream, report)
+                else:
+                    import_users(stream, app.config['PASSWORD_HASH_METHOD'], app.config['IMPORT_HASH_WORKERS'], report)
+        except (ValueError, UnicodeDecodeError) as e:
+            db.session.rollback()
+            error = f'Import stopped: {e}'
+        except Exception:
+            db.session.rollback()
+            log.exception('Bulk import %s failed', job_id)
+            error = 'Import failed; see the server log.'
+        finally:
+            db.session.remove()
+            os.remove(job_path(app, job_id, 'csv'))
+    log.info('bulk import of %s: %d of %d row(s) imported', kind, report.imported, report.rows)
+    write_status(app, job_id, dict(report.as_dict(), kind=kind, state='failed' if error else 'done', error=error))
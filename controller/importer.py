@@ -0,0 +1,192 @@
+import csv
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from werkzeug.datastructures import MultiDict
+from werkzeug.security import generate_password_hash
+from models.models import db, ParkingLot, User
+from controller.forms import AddLotForm, RegisterForm
+from controller.provisioning import add_spots
+
+log = logging.getLogger('parking.importer')
+
+# Rows validated, hashed and inserted per transaction
+BATCH_SIZE = 1000
+# Per-row errors kept for the report; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+LOT_COLUMNS = ('prime_location_name', 'address', 'pin_code', 'maximum_spots')
+USER_COLUMNS = ('fullname', 'email', 'phone', 'password', 'address', 'pincode')
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []  # (line number, message)
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def as_dict(self):
+        return {'rows': self.rows, 'imported': self.imported, 'failed': self.failed, 'errors': self.errors}
+
+
+def text_stream(binary):
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+def read_rows(stream, columns):
+    # Yields (line number, row dict) from a text stream without loading the file;
+    # line 1 is the header
+    reader = csv.DictReader(stream)
+    missing = [column for column in columns if column not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+    for row in reader:
+        yield reader.line_num, {key: (value or '').strip() for key, value in row.items() if key}
+
+
+def batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def form_errors(form):
+    return '; '.join(f'{name}: {message}' for name, messages in form.errors.items() for message in messages)
+
+
+def validate(form_class, data):
+    # The same validators as the add_lot and signup pages
+    form = form_class(formdata=MultiDict(data), meta={'csrf': False})
+    if form.validate():
+        return form, None
+    return None, form_errors(form)
+
+
+def import_lots(stream, report=None):
+    report = report or ImportReport()
+    for batch in batches(read_rows(stream, LOT_COLUMNS)):
+        valid = []
+        for line, row in batch:
+            report.rows += 1
+            form, error = validate(AddLotForm, row)
+            if error:
+                report.error(line, error)
+                continue
+            valid.append((line, form))
+
+        lots = [
+            ParkingLot(
+                prime_location_name=form.prime_location_name.data,
+                address=form.address.data,
+                pin_code=form.pin_code.data,
+                maximum_spots=form.maximum_spots.data,
+            )
+            for _, form in valid
+        ]
+        db.session.add_all(lots)
+        db.session.flush()
+        for lot in lots:
+            add_spots(lot.id, lot.maximum_spots)
+        db.session.commit()
+        report.imported += len(lots)
+        log.info('imported %d lot(s), %d row(s) read', report.imported, report.rows)
+    return report
+
+
+def hash_pool(workers):
+    # Spawned rather than forked: the web process has live threads (expiry worker,
+    # hash pool) whose locks a forked child could inherit mid-use
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def prepare_users(batch, seen, report):
+    valid = []
+    for line, row in batch:
+        report.rows += 1
+        row.setdefault('confirm_password', row['password'])
+        form, error = validate(RegisterForm, row)
+        if error:
+            report.error(line, error)
+        elif form.email.data in seen:
+            report.error(line, f'email: {form.email.data} appears earlier in the file.')
+        else:
+            seen.add(form.email.data)
+            valid.append((line, form))
+
+    emails = [form.email.data for _, form in valid]
+    existing = set(db.session.scalars(select(User.email).where(User.email.in_(emails))))
+    rows = []
+    for line, form in valid:
+        if form.email.data in existing:
+            report.error(line, f'email: {form.email.data} is already registered.')
+            continue
+        rows.append((line, {
+            'fullname': form.fullname.data,
+            'email': form.email.data,
+            'phone': form.phone.data,
+            'password': form.password.data,
+            'address': form.address.data,
+            'pincode': form.pincode.data,
+            'is_admin': False,
+        }))
+    return rows
+
+
+def insert_users(rows, hashes, report):
+    for (_, row), hashed in zip(rows, hashes):
+        row['password'] = hashed
+    if not rows:
+        return
+    try:
+        db.session.execute(insert(User), [row for _, row in rows])
+        db.session.commit()
+        report.imported += len(rows)
+    except IntegrityError:
+        # Lost a race with another writer; retry row by row so only the offenders fail
+        db.session.rollback()
+        for line, row in rows:
+            try:
+                db.session.execute(insert(User), [row])
+                db.session.commit()
+                report.imported += 1
+            except IntegrityError:
+                db.session.rollback()
+                report.error(line, f"email: {row['email']} is already registered.")
+    log.info('imported %d user(s), %d row(s) read', report.imported, report.rows)
+
+
+def import_users(stream, hash_method, workers=None, report=None):
+    report = report or ImportReport()
+    hash_password = partial(generate_password_hash, method=hash_method)
+    workers = workers or os.cpu_count() or 1
+    seen = set()
+    pending = None
+    with hash_pool(workers) as pool:
+        # Pipelined: the pool hashes one batch while the next is validated
+        for batch in batches(read_rows(stream, USER_COLUMNS)):
+            rows = prepare_users(batch, seen, report)
+            db.session.rollback()  # hand the connection back while the pool hashes
+            hashes = pool.map(hash_password, [row['password'] for _, row in rows],
+                              chunksize=max(1, len(rows) // (4 * workers)))
+            if pending:
+                insert_users(*pending, report)
+            pending = (rows, hashes)
+        if pending:
+            insert_users(*pending, report)
+    return report
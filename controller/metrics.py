@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+log = logging.getLogger('parking.metrics')
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = defaultdict(lambda: {
+            'requests': 0,
+            'seconds': 0.0,
+            'sql_statements': 0,
+            'sql_seconds': 0.0,
+            'buckets': [0] * len(LATENCY_BUCKETS),
+        })
+        self.slow_queries = 0
+
+    def record(self, endpoint, seconds, sql_statements, sql_seconds):
+        with self._lock:
+            stats = self.endpoints[endpoint]
+            stats['requests'] += 1
+            stats['seconds'] += seconds
+            stats['sql_statements'] += sql_statements
+            stats['sql_seconds'] += sql_seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats['buckets'][i] += 1
+
+    def record_slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def prometheus(self, extra=()):
+        with self._lock:
+            endpoints = {name: dict(stats, buckets=list(stats['buckets'])) for name, stats in self.endpoints.items()}
+            slow_queries = self.slow_queries
+
+        lines = [
+            '# HELP parking_request_duration_seconds Request wall time per endpoint.',
+            '# TYPE parking_request_duration_seconds histogram',
+        ]
+        for name, stats in sorted(endpoints.items()):
+            for bound, count in zip(LATENCY_BUCKETS, stats['buckets']):
+                lines.append(f'parking_request_duration_seconds_bucket{{endpoint="{name}",le="{bound}"}} {count}')
+            lines.append(f'parking_request_duration_seconds_bucket{{endpoint="{name}",le="+Inf"}} {stats["requests"]}')
+            lines.append(f'parking_request_duration_seconds_sum{{endpoint="{name}"}} {stats["seconds"]:.6f}')
+            lines.append(f'parking_request_duration_seconds_count{{endpoint="{name}"}} {stats["requests"]}')
+
+        lines += [
+            '# HELP parking_sql_statements_total SQL statements issued per endpoint.',
+            '# TYPE parking_sql_statements_total counter',
+        ]
+        lines += [f'parking_sql_statements_total{{endpoint="{name}"}} {stats["sql_statements"]}'
+                  for name, stats in sorted(endpoints.items())]
+        lines += [
+            '# HELP parking_sql_duration_seconds_total Time spent in the database per endpoint.',
+            '# TYPE parking_sql_duration_seconds_total counter',
+        ]
+        lines += [f'parking_sql_duration_seconds_total{{endpoint="{name}"}} {stats["sql_seconds"]:.6f}'
+                  for name, stats in sorted(endpoints.items())]
+        lines += [
+            '# HELP parking_slow_queries_total SQL statements slower than SLOW_QUERY_MS.',
+            '# TYPE parking_slow_queries_total counter',
+            f'parking_slow_queries_total {slow_queries}',
+        ]
+        for name, kind, help_text, value in extra:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', f'{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
+
+
+def init_metrics(app, db):
+    slow_query_seconds = app.config['SLOW_QUERY_MS'] / 1000
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+        g.sql_statements = 0
+        g.sql_seconds = 0.0
+
+    @app.teardown_request
+    def record_request(exc):
+        started = g.pop('request_started', None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        endpoint = request.endpoint or 'unknown'
+        request_metrics.record(endpoint, seconds, g.sql_statements, g.sql_seconds)
+        log.debug('request endpoint=%s seconds=%.4f sql_statements=%d sql_seconds=%.4f',
+                  endpoint, seconds, g.sql_statements, g.sql_seconds)
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info['query_started'].pop()
+        if has_request_context() and 'sql_statements' in g:
+            g.sql_statements += 1
+            g.sql_seconds += seconds
+        if seconds >= slow_query_seconds:
+            request_metrics.record_slow_query()
+            log.warning('slow query seconds=%.4f endpoint=%s sql=%s', seconds,
+                        request.endpoint if has_request_context() else None, ' '.join(statement.split()))
+
+    def on_error(context):
+        started = context.connection.info.get('query_started') if context.connection is not None else None
+        if started:
+            started.pop()
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', before_execute)
+        event.listen(db.engine, 'after_cursor_execute', after_execute)
+        event.listen(db.engine, 'handle_error', on_error)
@@ -0,0 +1,68 @@
+from sqlalchemy import func, case
+from models.models import db, ParkingLot, ParkingSpot
+
+
+def empty_occupancy():
+    return {'total': 0, 'available': 0, 'occupied': 0}
+
+
+def lot_occupancy(lot_ids=None):
+    # One GROUP BY over parking_spot instead of a COUNT per lot and status
+    query = db.session.query(
+        ParkingSpot.lot_id,
+        func.count(ParkingSpot.id),
+        func.sum(case((ParkingSpot.status == 'A', 1), else_=0)),
+        func.sum(case((ParkingSpot.status == 'O', 1), else_=0)),
+    ).group_by(ParkingSpot.lot_id)
+    if lot_ids is not None:
+        query = query.filter(ParkingSpot.lot_id.in_(lot_ids))
+
+    occupancy = {}
+    for lot_id, total, available, occupied in query.all():
+        occupancy[lot_id] = {
+            'total': total,
+            'available': int(available or 0),
+            'occupied': int(occupied or 0),
+        }
+    return occupancy
+
+
+def track_change(lot_id, available=0, occupied=0):
+    # Pending per-lot deltas of the current transaction, published on commit (controller.events)
+    deltas = db.session.info.setdefault('occupancy_deltas', {})
+    pending = deltas.setdefault(lot_id, [0, 0])
+    pending[0] += available
+    pending[1] += occupied
+
+
+def adjust_counts(lot_id, available=0, occupied=0):
+    # Relative UPDATE so concurrent bookings on the same lot don't overwrite each other
+    ParkingLot.query.filter_by(id=lot_id).update({
+        ParkingLot.available_count: ParkingLot.available_count + available,
+        ParkingLot.occupied_count: ParkingLot.occupied_count + occupied,
+    })
+    track_change(lot_id, available, occupied)
+
+
+def reconcile_counts(repair=True, lot_ids=None):
+    occupancy = lot_occupancy(lot_ids)
+    lots = ParkingLot.query
+    if lot_ids is not None:
+        lots = lots.filter(ParkingLot.id.in_(lot_ids))
+    drift = []
+    for lot in lots.all():
+        counts = occupancy.get(lot.id, empty_occupancy())
+        if lot.available_count != counts['available'] or lot.occupied_count != counts['occupied']:
+            drift.append({
+                'lot_id': lot.id,
+                'stored': (lot.available_count, lot.occupied_count),
+                'actual': (counts['available'], counts['occupied']),
+            })
+            if repair:
+                track_change(lot.id, counts['available'] - lot.available_count,
+                             counts['occupied'] - lot.occupied_count)
+                lot.available_count = counts['available']
+                lot.occupied_count = counts['occupied']
+    if repair and drift:
+        db.session.commit()
+    return drift
@@ -0,0 +1,57 @@
+from datetime import datetime
+from sqlalchemy import and_, or_
+from models.models import db, ParkingSpot, Reservation
+
+
+# Spot, lot and user are shown on every reservation row; load them with the row
+def reservation_details():
+    return (
+        db.joinedload(Reservation.spot).joinedload(ParkingSpot.lot),
+        db.joinedload(Reservation.user),
+    )
+
+
+# Cursor is "<start_time iso>_<reservation id>" of the last row on the previous page
+def parse_cursor(cursor):
+    try:
+        start, reservation_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(start), int(reservation_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def page_rows(query, per_page, cursor=None, model=Reservation):
+    # Keyset pagination on (start_time, id), newest first; one extra row tells
+    # whether there is a next page
+    position = parse_cursor(cursor)
+    if position:
+        start_time, reservation_id = position
+        query = query.filter(or_(
+            model.start_time < start_time,
+            and_(model.start_time == start_time, model.id < reservation_id),
+        ))
+    return query.order_by(model.start_time.desc(), model.id.desc()).limit(per_page + 1).all()
+
+
+def finish_page(rows, per_page):
+    next_cursor = None
+    if len(rows) > per_page:
+        last = rows[per_page - 1]
+        next_cursor = f'{last.start_time.isoformat()}_{last.id}'
+    return rows[:per_page], next_cursor
+
+
+def reservation_page(query, per_page, cursor=None):
+    return finish_page(page_rows(query, per_page, cursor), per_page)
+
+
+def history_page(sources, per_page, cursor=None):
+    # Same keyset page over several tables, e.g. reservation and reservation_archive
+    # ((query, model) pairs): each contributes its own first per_page + 1 rows past
+    # the cursor and the merged, re-sorted head is the page. Ids are unique across
+    # the tables since archived rows keep theirs.
+    rows = []
+    for query, model in sources:
+        rows += page_rows(query, per_page, cursor, model)
+    rows.sort(key=lambda row: (row.start_time, row.id), reverse=True)
+    return finish_page(rows, per_page)
@@ -0,0 +1,113 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+log = logging.getLogger('parking.passwords')
+
+
+class HasherBusy(Exception):
+    pass
+
+
+def method_prefix(method):
+    # Stored hashes look like "<method>$<salt>$<hash>" with werkzeug's defaults filled
+    # into the method, e.g. "pbkdf2:sha256" is stored as "pbkdf2:sha256:1000000"
+    name, *params = method.split(':')
+    if name == 'pbkdf2':
+        defaults = ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    elif name == 'scrypt':
+        defaults = [str(2 ** 15), '8', '1']
+    else:
+        return method
+    return ':'.join([name] + params + defaults[len(params):])
+
+
+def hash_cost(prefix):
+    # (algorithm, work factor) of a full method prefix, e.g.
+    # "pbkdf2:sha256:1000000" -> ("pbkdf2:sha256", 1000000)
+    name, *params = prefix.split(':')
+    try:
+        if name == 'pbkdf2' and len(params) == 2:
+            return f'{name}:{params[0]}', int(params[1])
+        if name == 'scrypt' and len(params) == 3:
+            n, r, p = map(int, params)
+            return name, n * r * p
+    except ValueError:
+        pass
+    return prefix, 0
+
+
+class PasswordHasher:
+    # Hashing policy plus a bounded pool that runs the key derivation. hashlib's
+    # pbkdf2/scrypt release the GIL, so the workers hash in parallel while at most
+    # `workers` hashes compete with request threads for CPU.
+    def __init__(self, method='pbkdf2:sha256', workers=None, max_pending=None, timeout=10):
+        self._pool = None
+        self._slots = None
+        self.configure(method=method, workers=workers or os.cpu_count() or 1,
+                       max_pending=max_pending, timeout=timeout)
+
+    def configure(self, method=None, workers=None, max_pending=None, timeout=None):
+        if method is not None:
+            self.method = method
+            self.prefix = method_prefix(method)
+        if timeout is not None:
+            self.timeout = timeout
+        if workers is not None:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+            self.workers = workers
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+            max_pending = max_pending or workers * 4
+        if max_pending is not None:
+            self.max_pending = max_pending
+            self._slots = threading.BoundedSemaphore(max_pending)
+
+    def _run(self, fn, *args):
+        # Admission control: when the pool's backlog is full, fail fast rather than
+        # pile up request threads behind it
+        slots = self._slots
+        if not slots.acquire(timeout=self.timeout):
+            raise HasherBusy()
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # Freed when the hash actually finishes (or is cancelled before it starts):
+        # a caller that times out can't stop one already running
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise HasherBusy()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        # Only upgrades: a hash stored with a higher work factor than the policy
+        # (e.g. by a newer werkzeug default) is kept
+        algorithm, cost = hash_cost(stored_hash.split('$', 1)[0])
+        policy_algorithm, policy_cost = hash_cost(self.prefix)
+        return algorithm != policy_algorithm or cost < policy_cost
+
+
+password_hasher = PasswordHasher()
+
+
+def authenticate(user, password):
+    # Checks the password and upgrades the stored hash to the current policy on
+    # success. The caller commits.
+    if user is None or not password_hasher.verify(user.password, password):
+        return False
+    if password_hasher.needs_rehash(user.password):
+        user.password = password_hasher.hash(password)
+        log.info('rehashed password for user id=%s to %s', user.id, password_hasher.prefix)
+    return True
@@ -0,0 +1,65 @@
+from sqlalchemy import delete, func, insert, not_, select
+from sqlalchemy.orm import aliased
+from models.models import db, ParkingSpot, Reservation
+from controller.occupancy import adjust_counts
+
+BATCH_SIZE = 1000
+
+
+def add_spots(lot_id, count):
+    # Numbering continues after the lot's highest spot number
+    last_spot_number = (
+        db.session.query(func.max(ParkingSpot.spot_number))
+        .filter_by(lot_id=lot_id)
+        .scalar()
+    ) or 0
+    rows = [
+        {'lot_id': lot_id, 'spot_number': last_spot_number + i + 1, 'status': 'A'}
+        for i in range(count)
+    ]
+    # Core executemany per batch: no ORM objects, ~10x faster than building a
+    # literal multi-row VALUES statement on SQLite
+    for i in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(ParkingSpot), rows[i:i + BATCH_SIZE])
+    adjust_counts(lot_id, available=count)
+    return count
+
+
+def booked(spot):
+    # The spot holds an active or upcoming reservation
+    return select(Reservation.id).where(
+        Reservation.spot_id == spot.id, Reservation.status == 'A'
+    ).exists()
+
+
+def has_bookings(lot_id):
+    return db.session.query(
+        select(ParkingSpot.id).where(ParkingSpot.lot_id == lot_id, booked(ParkingSpot)).exists()
+    ).scalar()
+
+
+def booked_lot_ids():
+    # Lots that can't be deleted without orphaning a reservation
+    return set(db.session.scalars(
+        select(ParkingSpot.lot_id)
+        .join(Reservation, Reservation.spot_id == ParkingSpot.id)
+        .where(Reservation.status == 'A')
+        .distinct()
+    ))
+
+
+def remove_spots(lot_id, count):
+    # Highest-numbered free spots first; spots holding an active (or upcoming) reservation stay
+    spot = aliased(ParkingSpot)
+    removable = (
+        select(spot.id)
+        .where(spot.lot_id == lot_id, spot.status == 'A', not_(booked(spot)))
+        .order_by(spot.spot_number.desc())
+        .limit(count)
+    )
+    removed = db.session.execute(
+        delete(ParkingSpot).where(ParkingSpot.id.in_(removable)),
+        execution_options={'synchronize_session': False},
+    ).rowcount
+    adjust_counts(lot_id, available=-removed)
+    return removed
@@ -0,0 +1,137 @@
+import threading
+import time
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from models.models import db, ParkingLot
+from controller.cache import lot_cache
+
+
+def normalize_pin(pin):
+    return ''.join((pin or '').split())
+
+
+def pin_distance(a, b):
+    # Numeric gap between two codes that share a prefix; nearby post offices are
+    # numbered close together within a sorting district
+    if a.isdigit() and b.isdigit():
+        return abs(int(a) - int(b))
+    return 0
+
+
+class TrieNode:
+    __slots__ = ('children', 'lots')
+
+    def __init__(self):
+        self.children = {}
+        self.lots = []  # (lot_id, pin) of lots whose pin code ends at this node
+
+    def walk(self, skip=None):
+        # Every lot in this subtree except the one under `skip`
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield from node.lots
+            stack.extend(child for child in node.children.values() if child is not skip)
+
+
+class ProximityIndex:
+    # Pin-code prefix trie over every lot. Codes sharing a longer prefix are
+    # nearer (region, sub-region, sorting district, ...), so a search walks down
+    # the query's path and then widens one prefix digit at a time, stopping as
+    # soon as it has k lots. Within each ring, lots with free spots rank first.
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._root = None
+        self._built_at = 0
+        self.rebuilds = 0
+
+    def configure(self, ttl=None):
+        if ttl is not None:
+            self.ttl = ttl
+
+    def invalidate(self):
+        self._root = None
+
+    def _build(self):
+        root = TrieNode()
+        for lot_id, pin_code in db.session.query(ParkingLot.id, ParkingLot.pin_code):
+            pin = normalize_pin(pin_code)
+            if not pin:
+                continue
+            node = root
+            for digit in pin:
+                node = node.children.setdefault(digit, TrieNode())
+            node.lots.append((lot_id, pin))
+        self.rebuilds += 1
+        return root
+
+    def root(self):
+        # Rebuilt lazily after a lot change, and every ttl seconds to pick up
+        # changes committed by other processes
+        with self._lock:
+            if self._root is None or time.monotonic() - self._built_at > self.ttl:
+                self._root = self._build()
+                self._built_at = time.monotonic()
+            return self._root
+
+    def nearest(self, pin, lots, k=5):
+        # Returns up to k lot ids ranked by shared prefix, then free spots before
+        # full, then numeric distance. lots is the availability cache by lot id;
+        # ids missing from it were deleted since the last rebuild.
+        pin = normalize_pin(pin)
+        path = [self.root()]
+        for digit in pin:
+            child = path[-1].children.get(digit)
+            if child is None:
+                break
+            path.append(child)
+
+        found = []
+        inner = None
+        for node in reversed(path):
+            # Lots sharing exactly this many leading digits with the query
+            ring = sorted(
+                (lots[lot_id]['available_count'] == 0, pin_distance(pin, lot_pin), lot_id)
+                for lot_id, lot_pin in node.walk(skip=inner) if lot_id in lots
+            )
+            found += [lot_id for _, _, lot_id in ring]
+            if len(found) >= k:
+                break
+            inner = node
+        return found[:k]
+
+
+lot_index = ProximityIndex()
+
+
+def nearest_lots(pin, k=5):
+    # Cached lot dicts for the k nearest lots. Full lots are still listed, after
+    # any with free spots at the same distance: a later window can be booked there.
+    lots = lot_cache.by_id()
+    return [lots[lot_id] for lot_id in lot_index.nearest(pin, lots, k)]
+
+
+# Only adding or removing a lot, or changing its pin code, moves it in the index;
+# availability is read from the lot cache at search time
+@event.listens_for(Session, 'after_flush')
+def _track_lot_changes(session, flush_context):
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, ParkingLot):
+            session.info['lot_index_changed'] = True
+            return
+    for obj in session.dirty:
+        if isinstance(obj, ParkingLot) and inspect(obj).attrs.pin_code.history.has_changes():
+            session.info['lot_index_changed'] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _refresh_on_commit(session):
+    if session.info.pop('lot_index_changed', False):
+        lot_index.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_on_rollback(session):
+    session.info.pop('lot_index_changed', None)
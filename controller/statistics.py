@@ -0,0 +1,71 @@
+from datetime import datetime
+from sqlalchemy import extract, func
+from models.models import db, ParkingLot, HourlyRollup, DailyRollup
+
+TIME_OF_DAY_LABELS = ["Morning", "Afternoon", "Evening", "Night"]
+
+
+def time_of_day(hour):
+    if 5 <= hour < 12:
+        return "Morning"
+    if 12 <= hour < 17:
+        return "Afternoon"
+    if 17 <= hour < 21:
+        return "Evening"
+    return "Night"
+
+
+def year_range(first_year, last_year):
+    # Plain range on the bucket instead of extract('year') so the primary key can be used
+    return (DailyRollup.bucket >= datetime(first_year, 1, 1),
+            DailyRollup.bucket < datetime(last_year + 1, 1, 1))
+
+
+def yearly_counts_per_lot(years):
+    lot_names = [name for (name,) in db.session.query(ParkingLot.prime_location_name).all()]
+    yearly_data = {name: [0] * len(years) for name in lot_names}
+
+    year = extract('year', DailyRollup.bucket)
+    rows = (
+        db.session.query(ParkingLot.prime_location_name, year, func.sum(DailyRollup.bookings))
+        .join(DailyRollup, DailyRollup.lot_id == ParkingLot.id)
+        .filter(*year_range(years[0], years[-1]))
+        .group_by(ParkingLot.prime_location_name, year)
+        .all()
+    )
+    for name, y, count in rows:
+        yearly_data[name][years.index(int(y))] += count
+    return yearly_data
+
+
+def time_of_day_counts():
+    hour = extract('hour', HourlyRollup.bucket)
+    time_of_day_data = {label: 0 for label in TIME_OF_DAY_LABELS}
+    for h, count in db.session.query(hour, func.sum(HourlyRollup.bookings)).group_by(hour).all():
+        time_of_day_data[time_of_day(int(h))] += count
+    return time_of_day_data
+
+
+def monthly_counts(year):
+    month = extract('month', DailyRollup.bucket)
+    monthly_data = [0] * 12
+    rows = (
+        db.session.query(month, func.sum(DailyRollup.bookings))
+        .filter(*year_range(year, year))
+        .group_by(month)
+        .all()
+    )
+    for m, count in rows:
+        monthly_data[int(m) - 1] = count
+    return monthly_data
+
+
+def parking_statistics_data(current_year):
+    years = list(range(current_year - 3, current_year + 1))
+    return {
+        'yearly_data': yearly_counts_per_lot(years),
+        'time_of_day_data': time_of_day_counts(),
+        'monthly_data': monthly_counts(current_year),
+        'years': years,
+        'current_year': current_year,
+    }
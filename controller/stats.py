@@ -0,0 +1,64 @@
+from datetime import datetime
+from flask import Blueprint, Response, current_app, render_template, redirect, url_for
+from flask_login import current_user, login_required
+from controller.auth import admin_required
+from controller.cache import lot_cache, user_cache
+from controller.events import occupancy_broker, occupancy_stream
+from controller.fragments import fragment_cache
+from controller.metrics import request_metrics
+from controller.statistics import parking_statistics_data
+
+stats_views = Blueprint('stats', __name__)
+
+
+@stats_views.route('/parking_statistics')
+@login_required
+def parking_statistics():
+    if not current_user.is_admin:
+        return redirect(url_for('user.dashboard_user'))
+
+    # Loaded from inside the template's cached fragment, so a cache hit skips the queries too
+    year = datetime.now().year
+    return render_template("parking_statistics.html", current_year=year,
+                           load_statistics=lambda: parking_statistics_data(year))
+
+@stats_views.route('/metrics')
+def metrics():
+    cache = lot_cache.stats()
+    users = user_cache.stats()
+    fragments = fragment_cache.stats()
+    body = request_metrics.prometheus(extra=[
+        ('parking_lot_cache_hits_total', 'counter', 'Lot availability cache hits.', cache['hits']),
+        ('parking_lot_cache_misses_total', 'counter', 'Lot availability cache misses.', cache['misses']),
+        ('parking_lot_cache_invalidations_total', 'counter', 'Lot availability cache invalidations.', cache['invalidations']),
+        ('parking_user_cache_hits_total', 'counter', 'User identity cache hits.', users['hits']),
+        ('parking_user_cache_misses_total', 'counter', 'User identity cache misses.', users['misses']),
+        ('parking_user_cache_evictions_total', 'counter', 'User identity cache LRU evictions.', users['evictions']),
+        ('parking_fragment_cache_hits_total', 'counter', 'Template fragment cache hits.', fragments['hits']),
+        ('parking_fragment_cache_misses_total', 'counter', 'Template fragment cache misses.', fragments['misses']),
+        ('parking_occupancy_subscribers', 'gauge', 'Open occupancy event streams.', occupancy_broker.subscriber_count()),
+    ])
+    return body, 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@stats_views.route('/events/occupancy')
+@login_required
+def occupancy_events():
+    # Server-sent events: a snapshot of every lot's counters, then deltas as bookings,
+    # releases and lot edits commit. The generator holds no database session, but
+    # it does hold a worker thread for up to EVENT_STREAM_SECONDS: serve the app
+    # with threaded or gevent workers (gunicorn -k gthread --threads N, or -k gevent).
+    snapshot = {'lots': [
+        {'id': lot['id'], 'name': lot['prime_location_name'],
+         'available': lot['available_count'], 'occupied': lot['occupied_count']}
+        for lot in lot_cache.lots()
+    ]}
+    return Response(occupancy_stream(snapshot, current_app.config['EVENT_STREAM_SECONDS']), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+@stats_views.route('/admin/cache_stats')
+@login_required
+@admin_required
+def cache_stats():
+    return dict(lot_cache.stats(), users=user_cache.stats(), fragments=fragment_cache.stats())
@@ -0,0 +1,175 @@
+from datetime import datetime
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash, session, request
+from flask_login import login_user, current_user, login_required
+from models.models import db, User, ParkingLot, ParkingSpot, Reservation, ReservationArchive
+from controller.forms import LoginForm, RegisterForm, EditProfileForm
+from controller.allocator import create_reservation, release_reservation, booking_window_error
+from controller.pagination import history_page, reservation_details
+from controller.cache import lot_cache, user_cache
+from controller.passwords import HasherBusy, authenticate, password_hasher
+from controller.proximity import nearest_lots
+
+user_views = Blueprint('user', __name__)
+
+RESERVATIONS_PER_PAGE = 50
+
+
+@user_views.route('/')
+@login_required
+def home():
+    if current_user.is_admin:
+        return redirect(url_for('admin.dashboard_admin'))
+    return redirect(url_for('user.dashboard_user'))
+
+@user_views.route('/dashboard_user')
+@login_required
+def dashboard_user():
+    reservations = (
+        Reservation.query
+        .options(*reservation_details())
+        .filter_by(user_id=current_user.id, status = 'A')
+        .order_by(Reservation.start_time.desc())
+        .all()
+    )
+
+
+    # Lot data for chart
+    lot_data = {}
+    for r in reservations:
+        loc = r.spot.lot.prime_location_name
+        lot_data[loc] = lot_data.get(loc, 0) + 1
+
+    lots = lot_cache.lots()
+
+    # "Find parking near me": defaults to the pin code on the user's profile
+    near = request.args.get('near', current_user.pincode or '').strip()
+    nearest = nearest_lots(near, current_app.config['NEAREST_LOTS_LIMIT']) if near else []
+
+    return render_template('dashboard_user.html', reservations=reservations, lot_data=lot_data, lots=lots,
+                           near=near, nearest=nearest)
+
+@user_views.route('/login', methods=['GET', 'POST'])
+def login():
+    form = LoginForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(email=form.email.data).first()
+        try:
+            authenticated = authenticate(user, form.password.data)
+        except HasherBusy:
+            flash('Too many sign-ins right now, please try again.')
+            return render_template('login.html', form=form), 503
+        if authenticated:
+            db.session.commit()  # saves a rehashed password
+            login_user(user)
+            return redirect(url_for('user.home'))
+        flash('Invalid credentials')
+    return render_template('login.html', form=form)
+
+@user_views.route('/signup', methods=['GET', 'POST'])
+def signup():
+    form = RegisterForm()
+    if form.validate_on_submit():
+        try:
+            hashed_pw = password_hasher.hash(form.password.data)
+        except HasherBusy:
+            flash('Too many sign-ups right now, please try again.')
+            return render_template('signup.html', form=form), 503
+        user = User(fullname=form.fullname.data, email=form.email.data, phone= form.phone.data, password=hashed_pw, address=form.address.data, pincode=form.pincode.data)
+        db.session.add(user)
+        db.session.commit()
+        flash('Registration successful, login now!')
+        return redirect(url_for('user.login'))
+    return render_template('signup.html', form=form)
+
+@user_views.route('/edit_profile', methods=['GET', 'POST'])
+@login_required
+def edit_profile():
+    form = EditProfileForm(obj=current_user)
+    if form.validate_on_submit():
+        current_user.fullname = form.fullname.data
+        current_user.email = form.email.data
+        current_user.address = form.address.data
+        current_user.pincode = form.pincode.data
+        db.session.commit()
+        flash('Profile updated.')
+        return redirect(url_for('user.dashboard_user'))
+    return render_template('edit_profile.html', form=form)
+
+@user_views.route('/book_spot', methods=['GET', 'POST'])
+@login_required
+def book_spot():
+    lot_id = request.args.get('lot_id') if request.method == 'GET' else request.form.get('lot_id')
+    lot = ParkingLot.query.get_or_404(lot_id)
+    available_spots = lot.available_count
+
+    if request.method == 'POST':
+        start_str = request.form.get('start_time')
+        end_str = request.form.get('end_time')
+
+        try:
+            start_time = datetime.strptime(start_str, '%Y-%m-%dT%H:%M')
+            end_time = datetime.strptime(end_str, '%Y-%m-%dT%H:%M')
+        except (TypeError, ValueError):
+            flash("Invalid date format.", "danger")
+            return redirect(url_for('user.book_spot', lot_id=lot.id))
+
+        now = datetime.now()
+
+        error = booking_window_error(start_time, end_time, now)
+        if error:
+            flash(error, "danger")
+            return redirect(url_for('user.book_spot', lot_id=lot.id))
+
+        reservation = create_reservation(current_user.id, lot.id, start_time, end_time, now=now)
+
+        if reservation is None:
+            flash("No spots available for the selected time.", "danger")
+            return redirect(url_for('user.dashboard_user'))
+
+        db.session.commit()
+
+        flash("Spot booked successfully!", "success")
+        return redirect(url_for('user.dashboard_user'))
+
+    return render_template("book_spot.html", lot=lot, available_spots=available_spots)
+
+
+@user_views.route('/release_spot/<int:reservation_id>', methods=['POST'])
+@login_required
+def release_spot(reservation_id):
+    reservation = Reservation.query.get_or_404(reservation_id)
+
+    if reservation.user_id != current_user.id:
+        flash("You are not authorized to release this reservation.", "danger")
+        return redirect(url_for('user.dashboard_user'))
+
+    if reservation.status != 'A':
+        flash("This spot is already released.", "warning")
+        return redirect(url_for('user.dashboard_user'))
+
+    if not release_reservation(reservation):
+        db.session.rollback()
+        flash("This spot is already released.", "warning")
+        return redirect(url_for('user.dashboard_user'))
+
+    db.session.commit()
+    flash("Spot released successfully.", "success")
+    return redirect(url_for('user.dashboard_user'))
+
+@user_views.route('/my_reservations')
+@login_required
+def my_reservations():
+    # Recent reservations live in reservation, older released ones in reservation_archive
+    sources = [
+        (model.query.options(db.joinedload(model.spot).joinedload(ParkingSpot.lot)).filter_by(user_id=current_user.id), model)
+        for model in (Reservation, ReservationArchive)
+    ]
+    reservations, next_cursor = history_page(sources, RESERVATIONS_PER_PAGE, request.args.get('cursor'))
+    return render_template('my_reservations.html', reservations=reservations, next_cursor=next_cursor)
+
+@user_views.route('/logout')
+def logout():
+    if current_user.is_authenticated:
+        user_cache.delete(current_user.id)
+    session.clear()
+    return redirect(url_for('user.login'))
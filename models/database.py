@@ -0,0 +1,77 @@
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from models.models import db
+
+DEFAULTS = {
+    'DATABASE_URL': 'sqlite:///parking.db',
+    # Server databases (PostgreSQL, MySQL)
+    'DB_POOL_SIZE': 10,
+    'DB_MAX_OVERFLOW': 20,
+    'DB_POOL_TIMEOUT': 30,
+    'DB_POOL_RECYCLE': 1800,
+    # SQLite
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+}
+
+
+def load_defaults(app, defaults):
+    # Each default is overridable through the environment variable of the same name,
+    # coerced to the default's type; values passed to create_app win over both
+    for key, default in defaults.items():
+        value = os.environ.get(key, default)
+        app.config.setdefault(key, type(default)(value))
+
+
+def load_config(app):
+    load_defaults(app, DEFAULTS)
+    app.config.setdefault('SQLALCHEMY_DATABASE_URI', app.config['DATABASE_URL'])
+
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+
+def engine_options(config):
+    if is_sqlite(config['SQLALCHEMY_DATABASE_URI']):
+        # pysqlite's own lock wait; the busy_timeout pragma below covers other connections too
+        return {'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000}}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        # Recycle before the server (or a proxy) drops idle connections, and
+        # ping on checkout so a dead connection is replaced instead of failing a request
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+
+
+def sqlite_pragmas(config):
+    # WAL lets readers run alongside the single writer; synchronous=NORMAL is
+    # durable across application crashes in WAL mode and skips an fsync per commit
+    return [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+    ]
+
+
+def init_database(app):
+    load_config(app)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    db.init_app(app)
+
+    if is_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+        pragmas = sqlite_pragmas(app.config)
+
+        def apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+        with app.app_context():
+            event.listen(db.engine, 'connect', apply_pragmas)
@@ -0,0 +1,95 @@
+from datetime import datetime
+from sqlalchemy import func, inspect, select
+from models.models import db, ParkingSpot, Reservation, ReservationArchive, HourlyRollup, DailyRollup
+
+# Applied schema versions; a database without this table predates migrations
+schema_version = db.Table(
+    'schema_version',
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('name', db.String(100)),
+    db.Column('applied_at', db.DateTime),
+)
+
+
+def create_indexes(model, *names):
+    indexes = {index.name: index for index in model.__table__.indexes}
+    for name in names:
+        indexes[name].create(db.engine, checkfirst=True)
+
+
+# Migrations check before altering so databases upgraded by older
+# setup_app versions (which patched the schema in place) are handled too
+
+def add_occupancy_counters():
+    from controller.occupancy import reconcile_counts
+    columns = [c['name'] for c in inspect(db.engine).get_columns('parking_lot')]
+    if 'available_count' not in columns:
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("ALTER TABLE parking_lot ADD COLUMN available_count INTEGER NOT NULL DEFAULT 0")
+            conn.exec_driver_sql("ALTER TABLE parking_lot ADD COLUMN occupied_count INTEGER NOT NULL DEFAULT 0")
+    reconcile_counts()
+
+
+def add_reservation_window_index():
+    create_indexes(Reservation, 'ix_reservation_spot_window')
+
+
+def add_reservation_rollups():
+    from controller.rollups import backfill
+    HourlyRollup.__table__.create(db.engine, checkfirst=True)
+    DailyRollup.__table__.create(db.engine, checkfirst=True)
+    # backfill() also reads the archive, which migration 5 would otherwise add later
+    ReservationArchive.__table__.create(db.engine, checkfirst=True)
+    backfill()
+
+
+def add_hot_path_indexes():
+    create_indexes(ParkingSpot, 'ix_parking_spot_lot_status')
+    create_indexes(Reservation, 'ix_reservation_user_status_start', 'ix_reservation_status_start',
+                   'ix_reservation_end_time')
+
+
+def add_reservation_archive():
+    ReservationArchive.__table__.create(db.engine, checkfirst=True)
+
+
+MIGRATIONS = [
+    (1, 'occupancy counters', add_occupancy_counters),
+    (2, 'reservation window index', add_reservation_window_index),
+    (3, 'reservation rollups', add_reservation_rollups),
+    (4, 'hot path indexes', add_hot_path_indexes),
+    (5, 'reservation archive', add_reservation_archive),
+]
+HEAD = MIGRATIONS[-1][0]
+
+
+def current_version():
+    if not inspect(db.engine).has_table('schema_version'):
+        return None
+    with db.engine.connect() as conn:
+        return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def stamp(version, name):
+    with db.engine.begin() as conn:
+        conn.execute(schema_version.insert().values(version=version, name=name, applied_at=datetime.now()))
+
+
+def upgrade():
+    version = current_version()
+    if version is None:
+        if not inspect(db.engine).has_table('parking_lot'):
+            # Fresh database: the models already describe the latest schema
+            db.create_all()
+            stamp(HEAD, MIGRATIONS[-1][1])
+            return []
+        schema_version.create(db.engine)
+        version = 0
+
+    applied = []
+    for number, name, migrate in MIGRATIONS:
+        if number > version:
+            migrate()
+            stamp(number, name)
+            applied.append((number, name))
+    return applied
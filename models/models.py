@@ -19,6 +19,9 @@ class ParkingLot(db.Model):
     address = db.Column(db.String(255))
     pin_code = db.Column(db.String(10))
     maximum_spots = db.Column(db.Integer, nullable=False)
+    # Denormalized from parking_spot.status, kept in step by the booking routes
+    available_count = db.Column(db.Integer, nullable=False, default=0)
+    occupied_count = db.Column(db.Integer, nullable=False, default=0)
     spots = db.relationship('ParkingSpot', backref='lot', lazy=True)
 
 class ParkingSpot(db.Model):
@@ -29,6 +32,8 @@ class ParkingSpot(db.Model):
     
     reservations = db.relationship('Reservation', backref='spot', lazy=True)
 
+    __table_args__ = (db.Index('ix_parking_spot_lot_status', 'lot_id', 'status'),)
+
 class Reservation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
@@ -37,8 +42,48 @@ class Reservation(db.Model):
     end_time = db.Column(db.DateTime)
     status = db.Column(db.String(1), default='A')  # 'A' for Active, 'I' for Inactive
     user = db.relationship('User', backref='reservations')
+
+    __table_args__ = (
+        # Overlap lookups for a spot's booked windows (see controller/allocator.py);
+        # also serves plain spot_id lookups
+        db.Index('ix_reservation_spot_window', 'spot_id', 'start_time', 'end_time'),
+        db.Index('ix_reservation_user_status_start', 'user_id', 'status', 'start_time'),
+        db.Index('ix_reservation_status_start', 'status', 'start_time'),
+        db.Index('ix_reservation_end_time', 'end_time'),
+    )
     #spot = db.relationship('ParkingSpot', backref='reservations')
 
+# Inactive reservations moved out of the hot table by controller/archive.py,
+# keeping their original ids
+class ReservationArchive(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    spot_id = db.Column(db.Integer, db.ForeignKey('parking_spot.id'))
+    start_time = db.Column(db.DateTime)
+    end_time = db.Column(db.DateTime)
+    status = db.Column(db.String(1), default='I')
+    archived_at = db.Column(db.DateTime)
+    user = db.relationship('User', viewonly=True)
+    spot = db.relationship('ParkingSpot', viewonly=True)
+
+    __table_args__ = (
+        db.Index('ix_reservation_archive_user_start', 'user_id', 'start_time'),
+        db.Index('ix_reservation_archive_start', 'start_time'),
+    )
+
+# Pre-aggregated reservation history, maintained by controller/rollups.py
+class HourlyRollup(db.Model):
+    lot_id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True)  # start of the hour
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    occupied_minutes = db.Column(db.Integer, nullable=False, default=0)
+
+class DailyRollup(db.Model):
+    lot_id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True)  # midnight of the day
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    occupied_minutes = db.Column(db.Integer, nullable=False, default=0)
+
 '''
     def total_cost(self):
         if self.leaving_timestamp:
@@ -0,0 +1,75 @@
+import os
+import sys
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app import create_app, setup_app
+from models.models import db
+from controller.cache import lot_cache, user_cache
+from controller.fragments import fragment_cache
+from controller.proximity import lot_index
+
+
+def clear_caches():
+    # The caches are process-wide, so drop whatever an earlier app or request left behind
+    lot_cache.invalidate()
+    lot_index.invalidate()
+    user_cache.clear()
+    fragment_cache.clear()
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    created = []
+
+    def make():
+        path = tmp_path / f'test{len(created)}.db'
+        app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+            'TEMPLATE_CACHE_DIR': '',
+        })
+        setup_app(app)
+        clear_caches()
+        created.append(app)
+        return app
+
+    yield make
+    for app in created:
+        with app.app_context():
+            db.engine.dispose()
+    clear_caches()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+def log_in(client, user_id):
+    # Straight into the session: password hashing is not what these tests measure
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+
+@contextmanager
+def statements(app):
+    # Every statement the block sends to the database, in order
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
@@ -0,0 +1,36 @@
+import pytest
+from models.models import db, User, ParkingLot
+from controller.provisioning import add_spots
+from conftest import log_in
+
+ADMIN_PAGES = ['/dashboard_admin', '/current_users', '/view_users', '/admin/lot/1/spots',
+               '/lot/update/1', '/lot/delete/1', '/admin/import', '/admin/export/reservations']
+
+
+@pytest.fixture
+def driver_client(app):
+    with app.app_context():
+        user = User(fullname='Driver', email='driver@example.com', password='unused')
+        lot = ParkingLot(prime_location_name='Lot', address='x', pin_code='700001', maximum_spots=1)
+        db.session.add_all([user, lot])
+        db.session.flush()
+        add_spots(lot.id, 1)
+        db.session.commit()
+        user_id = user.id
+    client = app.test_client()
+    log_in(client, user_id)
+    return client
+
+
+@pytest.mark.parametrize('url', ADMIN_PAGES)
+def test_drivers_cannot_open_admin_pages(driver_client, url):
+    response = driver_client.get(url)
+    assert response.status_code == 302
+    assert response.headers['Location'].startswith('/login')
+
+
+@pytest.mark.parametrize('url', ADMIN_PAGES)
+def test_anonymous_visitors_are_sent_to_login(app, url):
+    response = app.test_client().get(url)
+    assert response.status_code == 302
+    assert response.headers['Location'].startswith('/login')
@@ -0,0 +1,183 @@
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy.exc import OperationalError
+from models.models import db, User, ParkingLot, ParkingSpot, Reservation
+from controller.allocator import create_reservation, release_reservation
+from controller.expiry import run_expiry_cycle
+from controller.occupancy import reconcile_counts
+from controller.provisioning import add_spots
+from controller.rollups import backfill, booking_summary
+
+
+def make_lot(spots=2):
+    lot = ParkingLot(prime_location_name='Test Lot', address='x', pin_code='700001', maximum_spots=spots)
+    db.session.add(lot)
+    db.session.flush()
+    add_spots(lot.id, spots)
+    db.session.commit()
+    return lot.id
+
+
+def make_user(email='driver@example.com'):
+    user = User(fullname='Driver', email=email, password='unused', pincode='700001')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def counters(lot_id):
+    lot = db.session.get(ParkingLot, lot_id)
+    db.session.refresh(lot)
+    return lot.available_count, lot.occupied_count
+
+
+def test_concurrent_releases_move_the_counters_once(app):
+    now = datetime.now()
+    with app.app_context():
+        lot_id = make_lot(spots=2)
+        reservation = create_reservation(make_user(), lot_id, now - timedelta(hours=1), now + timedelta(hours=1), now=now)
+        db.session.commit()
+        reservation_id = reservation.id
+        assert counters(lot_id) == (1, 1)
+
+    ready = threading.Barrier(2)
+    results = []
+
+    def release():
+        with app.app_context():
+            reservation = db.session.get(Reservation, reservation_id)
+            reservation.spot  # loaded before either release writes
+            ready.wait()
+            released = release_reservation(reservation)
+            if released:
+                db.session.commit()
+            else:
+                db.session.rollback()
+            results.append(released)
+            db.session.remove()
+
+    threads = [threading.Thread(target=release) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == [False, True]
+    with app.app_context():
+        assert counters(lot_id) == (2, 0)
+        assert reconcile_counts(repair=False) == []
+        released = booking_summary()
+        backfill()
+        assert booking_summary() == released
+
+
+def tomorrow(hour):
+    return (datetime.now() + timedelta(days=1)).replace(hour=hour, minute=0, second=0, microsecond=0)
+
+
+def test_overlapping_windows_are_rejected_once_the_lot_is_full(app):
+    with app.app_context():
+        lot_id, user_id = make_lot(spots=1), make_user()
+        assert create_reservation(user_id, lot_id, tomorrow(10), tomorrow(12)) is not None
+        db.session.commit()
+
+        assert create_reservation(user_id, lot_id, tomorrow(11), tomorrow(13)) is None
+        assert create_reservation(user_id, lot_id, tomorrow(9), tomorrow(10) + timedelta(minutes=1)) is None
+        # Windows are half-open, so one may start exactly when the previous one ends
+        assert create_reservation(user_id, lot_id, tomorrow(12), tomorrow(14)) is not None
+        db.session.commit()
+
+
+def test_only_a_window_that_has_started_occupies_its_spot(app):
+    now = datetime.now()
+    with app.app_context():
+        lot_id, user_id = make_lot(spots=2), make_user()
+        upcoming = create_reservation(user_id, lot_id, tomorrow(10), tomorrow(12), now=now)
+        db.session.commit()
+        assert upcoming.spot.status == 'A'
+        assert counters(lot_id) == (2, 0)
+
+        current = create_reservation(user_id, lot_id, now, now + timedelta(hours=1), now=now)
+        db.session.commit()
+        assert current.spot.status == 'O'
+        assert counters(lot_id) == (1, 1)
+        assert reconcile_counts(repair=False) == []
+
+
+def test_release_before_the_window_starts_frees_the_window_only(app):
+    with app.app_context():
+        lot_id, user_id = make_lot(spots=1), make_user()
+        reservation = create_reservation(user_id, lot_id, tomorrow(10), tomorrow(12))
+        db.session.commit()
+
+        assert release_reservation(reservation) is True
+        db.session.commit()
+        assert reservation.status == 'I'
+        assert reservation.end_time == reservation.start_time
+        assert reservation.spot.status == 'A'
+        assert counters(lot_id) == (1, 0)
+
+        released = booking_summary()
+        backfill()
+        assert booking_summary() == released
+        assert create_reservation(user_id, lot_id, tomorrow(10), tomorrow(12)) is not None
+        db.session.commit()
+
+
+def test_expiry_and_activation_leave_the_counters_reconciled(app):
+    earlier = datetime.now() - timedelta(hours=2)
+    with app.app_context():
+        lot_id, user_id = make_lot(spots=2), make_user()
+        # Booked two hours ago: one ran until an hour ago, the other has started since
+        ended = create_reservation(user_id, lot_id, earlier, earlier + timedelta(hours=1), now=earlier)
+        started = create_reservation(user_id, lot_id, earlier + timedelta(minutes=30),
+                                     earlier + timedelta(hours=4), now=earlier)
+        db.session.commit()
+        ended_id, started_id = ended.id, started.id
+        assert counters(lot_id) == (1, 1)
+
+        expired, activated = run_expiry_cycle()
+        assert (expired, activated) == (1, 1)
+        assert db.session.get(Reservation, ended_id).status == 'I'
+        assert db.session.get(Reservation, started_id).spot.status == 'O'
+        assert counters(lot_id) == (1, 1)
+        assert reconcile_counts(repair=False) == []
+
+
+def test_concurrent_bookings_never_share_a_spot(app):
+    spots, threads_count, attempts = 10, 8, 3
+    with app.app_context():
+        lot_id, user_id = make_lot(spots=spots), make_user()
+
+    claims, lock = [], threading.Lock()
+
+    def book():
+        with app.app_context():
+            for _ in range(attempts):
+                while True:
+                    try:
+                        now = datetime.now()
+                        reservation = create_reservation(user_id, lot_id, now, now + timedelta(hours=1), now=now)
+                        spot_id = reservation.spot_id if reservation else None
+                        db.session.commit()
+                        break
+                    except OperationalError:
+                        db.session.rollback()
+                if spot_id is not None:
+                    with lock:
+                        claims.append(spot_id)
+            db.session.remove()
+
+    threads = [threading.Thread(target=book) for _ in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(claims) == spots
+    assert max(Counter(claims).values()) == 1
+    with app.app_context():
+        assert ParkingSpot.query.filter_by(lot_id=lot_id, status='O').count() == spots
+        assert counters(lot_id) == (0, spots)
+        assert reconcile_counts(repair=False) == []
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+from models.models import db, User, ParkingLot
+from controller.provisioning import add_spots
+from conftest import log_in
+
+
+def setup_booking(app):
+    with app.app_context():
+        user = User(fullname='Driver', email='driver@example.com', password='unused', pincode='700001')
+        lot = ParkingLot(prime_location_name='Api Lot', address='x', pin_code='700001', maximum_spots=2)
+        db.session.add_all([user, lot])
+        db.session.flush()
+        add_spots(lot.id, 2)
+        db.session.commit()
+        user_id, lot_id = user.id, lot.id
+    client = app.test_client()
+    log_in(client, user_id)
+    return client, lot_id
+
+
+def test_booking_accepts_times_with_an_offset(app):
+    client, lot_id = setup_booking(app)
+    start = datetime.now(timezone(timedelta(hours=5, minutes=30))) + timedelta(hours=2)
+    response = client.post('/api/reservations', json={
+        'lot_id': lot_id,
+        'start_time': start.isoformat(timespec='minutes'),
+        'end_time': (start + timedelta(hours=1)).isoformat(timespec='minutes'),
+    })
+    assert response.status_code == 201
+    local_start = start.astimezone().replace(tzinfo=None, second=0, microsecond=0)
+    assert response.get_json()['start_time'] == local_start.isoformat()
+
+
+def test_writes_require_a_json_body(app):
+    client, lot_id = setup_booking(app)
+    start = (datetime.now() + timedelta(hours=2)).strftime('%Y-%m-%dT%H:%M')
+    end = (datetime.now() + timedelta(hours=3)).strftime('%Y-%m-%dT%H:%M')
+    form = client.post('/api/reservations', data={'lot_id': lot_id, 'start_time': start, 'end_time': end})
+    assert form.status_code == 415
+    assert client.post('/api/reservations/1/release').status_code == 415
+    assert client.post('/api/reservations', json=[lot_id]).status_code == 400
@@ -0,0 +1,41 @@
+import csv
+import io
+from datetime import datetime, timedelta
+from models.models import db, User, ParkingLot
+from controller.allocator import create_reservation
+from controller.provisioning import add_spots
+from conftest import log_in
+
+
+def admin_client(app):
+    with app.app_context():
+        admin_id = User.query.filter_by(is_admin=True).one().id
+    client = app.test_client()
+    log_in(client, admin_id)
+    return client
+
+
+def test_export_rejects_a_malformed_date(app):
+    response = admin_client(app).get('/admin/export/reservations?start_date=bad')
+    assert response.status_code == 400
+
+
+def test_export_keeps_formulas_as_text(app):
+    now = datetime.now()
+    with app.app_context():
+        user = User(fullname='=HYPERLINK("http://example.com")', email='driver@example.com',
+                    password='unused', phone='+911234567890')
+        lot = ParkingLot(prime_location_name='@Lot', address='-1+1', pin_code='700001', maximum_spots=1)
+        db.session.add_all([user, lot])
+        db.session.flush()
+        add_spots(lot.id, 1)
+        create_reservation(user.id, lot.id, now, now + timedelta(hours=1), now=now)
+        db.session.commit()
+
+    body = admin_client(app).get('/admin/export/reservations').get_data(as_text=True)
+    row = list(csv.DictReader(io.StringIO(body)))[0]
+    assert row['user_name'] == '\'=HYPERLINK("http://example.com")'
+    assert row['user_phone'] == "'+911234567890"
+    assert row['lot_name'] == "'@Lot"
+    assert row['lot_address'] == "'-1+1"
+    assert row['lot_pin_code'] == '700001'
@@ -0,0 +1,15 @@
+import os
+import time
+from controller.import_jobs import JOB_RETENTION_SECONDS, prune_jobs
+
+
+def test_prune_removes_only_expired_job_files(tmp_path):
+    old = tmp_path / ('a' * 32 + '.json')
+    recent = tmp_path / ('b' * 32 + '.json')
+    for path in (old, recent):
+        path.write_text('{}')
+    expired = time.time() - JOB_RETENTION_SECONDS - 60
+    os.utime(old, (expired, expired))
+
+    prune_jobs(tmp_path)
+    assert sorted(os.listdir(tmp_path)) == [recent.name]
@@ -0,0 +1,29 @@
+import threading
+import pytest
+from controller.passwords import HasherBusy, PasswordHasher
+
+
+def test_a_timed_out_hash_keeps_its_slot_until_it_finishes():
+    hasher = PasswordHasher(workers=1, max_pending=1, timeout=0.1)
+    release = threading.Event()
+
+    try:
+        with pytest.raises(HasherBusy):
+            hasher._run(release.wait)
+        # Still running in the pool, so its slot is still taken
+        assert not hasher._slots.acquire(blocking=False)
+        with pytest.raises(HasherBusy):
+            hasher._run(lambda: 'queued')
+    finally:
+        release.set()
+    hasher.timeout = 5
+    assert hasher._run(lambda: 'done') == 'done'
+
+
+def test_a_policy_hash_needs_no_rehash():
+    hasher = PasswordHasher(workers=1)
+    stored = hasher.hash('secret1')
+    assert hasher.verify(stored, 'secret1')
+    assert not hasher.needs_rehash(stored)
+    assert hasher.needs_rehash('pbkdf2:sha256:600000$salt$hash')
+    assert not hasher.needs_rehash('pbkdf2:sha256:2000000$salt$hash')
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+from models.models import db, User, ParkingLot
+from controller.allocator import create_reservation
+from controller.provisioning import add_spots
+from controller.proximity import nearest_lots
+
+
+def add_lot(name, pin_code, spots=1):
+    lot = ParkingLot(prime_location_name=name, address='x', pin_code=pin_code, maximum_spots=spots)
+    db.session.add(lot)
+    db.session.flush()
+    add_spots(lot.id, spots)
+    db.session.commit()
+    return lot.id
+
+
+def test_lots_with_free_spots_rank_before_full_ones(app):
+    now = datetime.now()
+    with app.app_context():
+        user = User(fullname='Driver', email='driver@example.com', password='unused')
+        db.session.add(user)
+        db.session.commit()
+        full = add_lot('Full', '700001')
+        create_reservation(user.id, full, now - timedelta(hours=1), now + timedelta(hours=1), now=now)
+        db.session.commit()
+        free = add_lot('Free', '700002')
+        farther = add_lot('Farther', '710001')
+
+        assert [lot['id'] for lot in nearest_lots('700000', 3)] == [free, full, farther]
+        assert [lot['id'] for lot in nearest_lots('700000', 1)] == [free]
+
+
+def test_signup_stores_the_pin_code(app):
+    response = app.test_client().post('/signup', data={
+        'fullname': 'New Driver', 'email': 'new@example.com', 'phone': '1234567890',
+        'password': 'secret1', 'confirm_password': 'secret1', 'address': 'Some street', 'pincode': '700001',
+    })
+    assert response.status_code == 302
+    with app.app_context():
+        assert User.query.filter_by(email='new@example.com').one().pincode == '700001'
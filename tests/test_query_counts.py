@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+from models.models import db, User, ParkingLot
+from controller.allocator import create_reservation
+from controller.provisioning import add_spots
+from conftest import clear_caches, log_in, statements
+
+SPOTS_PER_LOT = 3
+MANY_LOTS = 12
+
+# Statements per request with cold caches; raise only with a reason
+BUDGET = {
+    'GET /dashboard_user': 4,
+    'GET /book_spot': 2,
+    'POST /book_spot': 7,
+    'GET /dashboard_admin': 5,
+    'GET /lot/update': 2,
+    'POST /lot/update': 4,
+    'GET /lot/delete': 2,
+    'POST /lot/delete': 6,
+}
+
+
+def build(app, lot_count):
+    # lot_count lots, each with one of the user's reservations running now,
+    # plus an empty lot for the delete routes
+    now = datetime.now()
+    with app.app_context():
+        user = User(fullname='Query Count', email='count@example.com', password='unused',
+                    phone='1234567890', address='x', pincode='700001')
+        db.session.add(user)
+        lots = [ParkingLot(prime_location_name=f'Lot {i}', address='x', pin_code=f'7000{i:02d}',
+                           maximum_spots=SPOTS_PER_LOT) for i in range(lot_count + 1)]
+        db.session.add_all(lots)
+        db.session.flush()
+        for lot in lots:
+            add_spots(lot.id, SPOTS_PER_LOT)
+        db.session.commit()
+        for lot in lots[:-1]:
+            create_reservation(user.id, lot.id, now - timedelta(hours=1), now + timedelta(hours=2), now=now)
+            db.session.commit()
+        admin = User.query.filter_by(is_admin=True).one()
+        return admin.id, user.id, lots[0].id, lots[-1].id
+
+
+def count(app, client, method, url, **data):
+    clear_caches()
+    with statements(app) as captured:
+        response = client.open(url, method=method, data=data or None)
+    assert response.status_code in (200, 302), f'{method} {url} returned {response.status_code}'
+    return len(captured)
+
+
+def page_counts(app, lot_count):
+    admin_id, user_id, busy_lot, empty_lot = build(app, lot_count)
+    start = (datetime.now() + timedelta(hours=3)).strftime('%Y-%m-%dT%H:%M')
+    end = (datetime.now() + timedelta(hours=5)).strftime('%Y-%m-%dT%H:%M')
+    counts = {}
+
+    client = app.test_client()
+    log_in(client, user_id)
+    counts['GET /dashboard_user'] = count(app, client, 'GET', '/dashboard_user')
+    counts['GET /book_spot'] = count(app, client, 'GET', f'/book_spot?lot_id={busy_lot}')
+    counts['POST /book_spot'] = count(app, client, 'POST', '/book_spot',
+                                      lot_id=busy_lot, start_time=start, end_time=end)
+
+    client = app.test_client()
+    log_in(client, admin_id)
+    counts['GET /dashboard_admin'] = count(app, client, 'GET', '/dashboard_admin')
+    counts['GET /lot/update'] = count(app, client, 'GET', f'/lot/update/{busy_lot}')
+    counts['POST /lot/update'] = count(app, client, 'POST', f'/lot/update/{busy_lot}',
+                                       prime_location_name='Renamed', address='y', pin_code='700001',
+                                       maximum_spots=SPOTS_PER_LOT)
+    counts['GET /lot/delete'] = count(app, client, 'GET', f'/lot/delete/{empty_lot}')
+    counts['POST /lot/delete'] = count(app, client, 'POST', f'/lot/delete/{empty_lot}')
+    return counts
+
+
+def test_page_query_counts_do_not_grow_with_lots(make_app):
+    one = page_counts(make_app(), 1)
+    many = page_counts(make_app(), MANY_LOTS)
+    assert many == one
+    assert {route: n for route, n in one.items() if n > BUDGET[route]} == {}
@@ -0,0 +1,61 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from models.models import db
+from conftest import statements
+
+HOT_TABLES = ('reservation', 'parking_spot')
+
+
+def route_statements(app):
+    # Drives the main routes and returns the statements each one issued
+    client = app.test_client()
+    captured = defaultdict(list)
+
+    def hit(method, url, **data):
+        with statements(app) as issued:
+            client.open(url, method=method, data=data or None)
+        captured[f'{method} {url.split("?")[0]}'] += [
+            (statement, parameters) for statement, parameters in issued
+            if not statement.lstrip().upper().startswith('INSERT')
+        ]
+
+    start = (datetime.now() + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M')
+    end = (datetime.now() + timedelta(hours=3)).strftime('%Y-%m-%dT%H:%M')
+
+    hit('POST', '/login', email='admin@ezpark.com', password='admin')
+    hit('POST', '/add_lot', prime_location_name='Plan Lot', address='x', pin_code='700001', maximum_spots=10)
+    hit('POST', '/add_spot', lot_id=1, num_spots=2)
+    hit('POST', '/lot/update/1', prime_location_name='Plan Lot', address='x', pin_code='700001', maximum_spots=8)
+    for url in ('/dashboard_admin', '/parking_statistics', '/view_users', '/current_users',
+                '/admin/lot/1/spots', '/lot/delete/1'):
+        hit('GET', url)
+    client.get('/logout')
+    hit('POST', '/signup', fullname='Plan User', phone='1234567890', email='plan@example.com',
+        password='secret1', confirm_password='secret1', address='x', pincode='700001')
+    hit('POST', '/login', email='plan@example.com', password='secret1')
+    hit('GET', '/dashboard_user')
+    hit('GET', '/book_spot?lot_id=1')
+    hit('POST', '/book_spot', lot_id=1, start_time=start, end_time=end)
+    hit('GET', '/my_reservations')
+    hit('POST', '/release_spot/1')
+    return captured
+
+
+def test_hot_tables_are_never_fully_scanned(app):
+    captured = route_statements(app)
+    assert sum(len(issued) for issued in captured.values()) > 0
+
+    scans = []
+    with app.app_context():
+        raw = db.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            for route, issued in captured.items():
+                for statement, parameters in issued:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+                    for step in (row[-1] for row in cursor.fetchall()):
+                        if any(step.startswith(f'SCAN {table}') for table in HOT_TABLES):
+                            scans.append(f'{route}: {step} in {" ".join(statement.split())}')
+        finally:
+            raw.close()
+    assert scans == []